@@ -0,0 +1,179 @@
+"""演出の待ち時間を管理するasyncioベースのスケジューラー
+
+asyncio は実際に待機するときに初めて読み込む（ヘッドレスでは読み込まない）。
+"""
+
+import os
+import sys
+import time
+
+import metrics
+
+
+class RealClock:
+    """実時間で待機するクロック"""
+
+    def now(self):
+        return time.monotonic()
+
+    async def sleep(self, seconds):
+        import asyncio
+        await asyncio.sleep(seconds)
+
+
+class InstantClock:
+    """待機せずに経過時間だけを記録するクロック（ヘッドレス・テスト用）"""
+
+    def __init__(self):
+        self.elapsed = 0.0
+
+    def now(self):
+        return self.elapsed
+
+    async def sleep(self, seconds):
+        self.elapsed += seconds
+
+
+class AnimationScheduler:
+    """
+    演出のフレーム表示と待ち時間を管理するクラス
+
+    待ち時間はクロック経由で asyncio 上で待機し、turbo倍率で短縮できる。
+    演出中にEnterキーが押されると、次の入力待ちまでの残りの待ち時間を
+    全てスキップする（早送り）。headless の場合は一切待機しない。
+    """
+
+    def __init__(self, clock=None, turbo=1.0, headless=False, skip_with_key=True):
+        """
+        Args:
+            clock: 待機に使うクロック（省略時はRealClock）
+            turbo: 待ち時間の短縮倍率（2.0なら半分の時間）
+            headless: Trueなら待機しない
+            skip_with_key: Enterキーによるスキップを受け付けるか
+        """
+        self.clock = clock or RealClock()
+        self.turbo = turbo
+        self.headless = headless
+        self.skip_with_key = skip_with_key
+        self._skipping = False
+        self._skip_event = None
+        self._loop = None
+
+    def configure(self, clock=None, turbo=None, headless=None):
+        """設定を変更する"""
+        if clock is not None:
+            self.clock = clock
+        if turbo is not None:
+            self.turbo = turbo
+        if headless is not None:
+            self.headless = headless
+
+    def skip(self):
+        """現在の演出をスキップする（次の reset_skip まで早送り）"""
+        self._skipping = True
+        if self._skip_event is not None:
+            self._skip_event.set()
+
+    def reset_skip(self):
+        """早送りを解除する（入力待ちの前に呼ぶ）"""
+        self._skipping = False
+
+    def is_instant(self):
+        """待機せずに進む状態かチェック"""
+        return self.headless or self._skipping or self.turbo <= 0
+
+    def wait(self, seconds):
+        """
+        演出の待ち時間だけ待機する（同期コード専用）
+
+        専用のイベントループで待機するので、イベントループの中（async関数）からは
+        呼べない。その場合は wait_async を await する。
+
+        Args:
+            seconds: 通常速度での待ち時間（秒）
+
+        Raises:
+            RuntimeError: イベントループの中から呼ばれた場合
+        """
+        if self.is_instant() or seconds <= 0:
+            return
+        import asyncio
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError("イベントループの中では scheduler.wait_async() を await してください")
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        with metrics.timer("phase", "animation"):
+            self._loop.run_until_complete(self.wait_async(seconds))
+
+    async def wait_async(self, seconds):
+        """wait() の非同期版（スキップされると途中で戻る）"""
+        if self.is_instant() or seconds <= 0:
+            return
+
+        import asyncio
+        delay = seconds / self.turbo
+        self._skip_event = asyncio.Event()
+        key_reader = self._attach_key_reader()
+        try:
+            sleeper = asyncio.ensure_future(self.clock.sleep(delay))
+            skipper = asyncio.ensure_future(self._skip_event.wait())
+            done, pending = await asyncio.wait({sleeper, skipper}, return_when=asyncio.FIRST_COMPLETED)
+            for task in pending:
+                task.cancel()
+            # キャンセルしたタスクが終わるのを待つ（ループに保留のまま残さない）
+            await asyncio.gather(*pending, return_exceptions=True)
+        finally:
+            if key_reader is not None:
+                asyncio.get_running_loop().remove_reader(key_reader)
+            self._skip_event = None
+
+    def play(self, frames, show):
+        """
+        フレームを順番に表示しながら待機する
+
+        Args:
+            frames: (フレーム, 待ち時間) のイテラブル
+            show: フレームを表示する関数
+        """
+        for frame, seconds in frames:
+            show(frame)
+            self.wait(seconds)
+
+    def _attach_key_reader(self):
+        """標準入力のキー入力でスキップできるようにする（端末の場合のみ）"""
+        if not self.skip_with_key or not hasattr(sys.stdin, "fileno"):
+            return None
+        try:
+            fd = sys.stdin.fileno()
+            if not os.isatty(fd):
+                return None
+            import asyncio
+            asyncio.get_running_loop().add_reader(fd, self._on_key, fd)
+        except (OSError, ValueError, NotImplementedError):
+            return None
+        return fd
+
+    def _on_key(self, fd):
+        """キー入力を読み捨ててスキップする"""
+        os.read(fd, 1024)
+        self.skip()
+
+
+def _env_float(name, default):
+    """環境変数を数値として取得"""
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+# ゲーム全体で共有するスケジューラー
+# RPG_TURBO: 早送り倍率, RPG_HEADLESS=1: 待機なし
+scheduler = AnimationScheduler(
+    turbo=_env_float("RPG_TURBO", 1.0),
+    headless=os.environ.get("RPG_HEADLESS") == "1"
+)
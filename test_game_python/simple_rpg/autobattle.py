@@ -0,0 +1,157 @@
+"""自動戦闘（描画・入力・待機なしで戦闘をまとめて行うレベル上げ）
+
+使い方（simple_rpg ディレクトリで実行）:
+    python -m autobattle -n 500 --heal-below 30 --seed 1
+"""
+
+import time
+from collections import Counter
+
+from combat import MAGIC_LIST
+from engine import BattleEngine
+from enemy_registry import create_enemy
+
+MAX_AUTO_BATTLES = 1000  # 自動戦闘1回で行える最大戦闘回数（メニュー・サーバーの上限）
+HEAL_MAGIC = "ヒール"
+HEAL_MAGIC_COST = next(mp_cost for _, name, mp_cost, _, _ in MAGIC_LIST if name == HEAL_MAGIC)
+
+
+class GrindPolicy:
+    """
+    自動戦闘のプレイヤーの行動選択
+
+    HPが heal_below の割合を下回ったら、ヒール → 回復薬 → 魔法の水（ヒール用のMPを補う）
+    の順に使えるものを使い、それ以外は通常攻撃する。
+    """
+
+    def __init__(self, heal_below=0.3, use_magic=True, use_potions=True, use_ethers=True):
+        """
+        Args:
+            heal_below: 回復するHPの割合（0〜1、0なら回復しない）
+            use_magic: ヒールを使うか
+            use_potions: 回復薬を使うか
+            use_ethers: MPが足りないときに魔法の水を使うか
+        """
+        self.heal_below = heal_below
+        self.use_magic = use_magic
+        self.use_potions = use_potions
+        self.use_ethers = use_ethers
+
+    def __call__(self, engine):
+        """
+        Args:
+            engine: BattleEngineオブジェクト
+
+        Returns:
+            tuple: (行動, オプション)
+        """
+        player = engine.player
+        if player.hp < player.max_hp * self.heal_below:
+            if self.use_magic and player.mp >= HEAL_MAGIC_COST:
+                return "magic", HEAL_MAGIC
+            if self.use_potions and player.items.get("回復薬", 0) > 0:
+                return "item", "回復薬"
+            if self.use_magic and self.use_ethers and player.items.get("魔法の水", 0) > 0:
+                return "item", "魔法の水"
+        return "attack", None
+
+
+def attack_only(engine):
+    """毎ターン通常攻撃する"""
+    return "attack", None
+
+
+def auto_battle(player, n, policy=None, rng=None, rest=True, recorder=None, enemy_policy=None):
+    """
+    n回の戦闘を描画・待機なしで続けて行う（敗北した時点で終了）
+
+    Args:
+        player: プレイヤーのCharacterオブジェクト
+        n: 戦闘回数
+        policy: BattleEngineを受け取り (行動, オプション) を返す関数（省略時は GrindPolicy()）
+        rng: 乱数生成器（省略時はrandomモジュール）
+        rest: 戦闘の間に休憩してHP・MPを全回復するか
+        recorder: 戦闘を記録するBattleRecorder（省略時は記録しない）
+        enemy_policy: 敵AI（省略時は 70/30 の抽選）
+
+    Returns:
+        dict: battles, outcomes（結果ごとの回数）, exp, start_level, end_level,
+              items_used, magic_used（名前ごとの回数）, turns, seconds
+
+    Raises:
+        ValueError: recorder と既定以外の enemy_policy を同時に指定した場合（再生できないため）
+    """
+    if recorder is not None:
+        recorder.check_enemy_policy(enemy_policy)
+    policy = policy or GrindPolicy()
+    outcomes = Counter()
+    items_used = Counter()
+    magic_used = Counter()
+    exp = turns = battles = 0
+    start_level = player.level
+    start = time.perf_counter()
+
+    while battles < n:
+        battles += 1
+        battle_rng = recorder.begin(player) if recorder is not None else rng
+        engine = BattleEngine(player, create_enemy(player.level, battle_rng), battle_rng, enemy_policy)
+        engine.start()
+
+        while engine.result is None:
+            action, option = policy(engine)
+            engine.step(action, option)
+            if recorder is not None:
+                recorder.record(action, option)
+            if action == "item":
+                items_used[option] += 1
+            elif action == "magic":
+                magic_used[option] += 1
+
+        if recorder is not None:
+            recorder.end(engine)
+        outcomes[engine.result] += 1
+        turns += engine.turn - 1
+        if engine.result == "defeat":
+            break
+        if engine.result == "victory":
+            exp += engine.enemy.exp_reward
+        if rest:
+            player.rest()
+
+    return {
+        "battles": battles,
+        "outcomes": outcomes,
+        "exp": exp,
+        "start_level": start_level,
+        "end_level": player.level,
+        "items_used": items_used,
+        "magic_used": magic_used,
+        "turns": turns,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def main():
+    """コマンドラインから実行（新規ゲームのプレイヤーで自動戦闘）"""
+    import argparse
+    import random
+
+    from character import Character, START_HP, START_MP, START_ATTACK, START_DEFENSE
+    from ui import show_auto_battle_summary
+
+    parser = argparse.ArgumentParser(description="自動戦闘をまとめて実行")
+    parser.add_argument("-n", type=int, default=100, help="戦闘回数")
+    parser.add_argument("--heal-below", type=int, default=30, help="回復するHPの割合（%%）")
+    parser.add_argument("--no-items", action="store_true", help="アイテムを使わない")
+    parser.add_argument("--no-rest", action="store_true", help="戦闘の間に休憩しない")
+    parser.add_argument("--seed", type=int, default=None, help="乱数シード")
+    args = parser.parse_args()
+
+    player = Character("勇者", START_HP, START_HP, START_MP, START_MP, START_ATTACK, START_DEFENSE, level=1)
+    policy = GrindPolicy(args.heal_below / 100, use_potions=not args.no_items, use_ethers=not args.no_items)
+    summary = auto_battle(player, args.n, policy, random.Random(args.seed), rest=not args.no_rest)
+    show_auto_battle_summary(summary, player)
+
+
+if __name__ == "__main__":
+    main()
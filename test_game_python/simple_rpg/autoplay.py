@@ -0,0 +1,108 @@
+"""スクリプトやランダムな入力で main.game_loop を待ち時間なしに自動実行する
+
+使い方（simple_rpg ディレクトリで実行）:
+    python -m autoplay script.txt               # スクリプトの回答で実行
+    python -m autoplay --random 100000 --seed 1 # ランダムな回答で連続テスト
+    python -m autoplay script.txt --output record --transcript out.txt
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+
+from rich.text import Text
+
+from animation import scheduler
+from game_io import RandomInput, ScriptedInput, ScriptExhausted, recorded_output, set_input, set_output
+
+
+def run(provider, output="null", workdir=None, max_games=None):
+    """
+    入力元の回答を使い切るまで game_loop を繰り返し実行する
+
+    Args:
+        provider: ScriptedInput（または RandomInput）
+        output: 出力先（"null" / "record" / "terminal"）
+        workdir: セーブやログを書き出すディレクトリ（省略時は一時ディレクトリ）
+        max_games: game_loop を実行する最大回数（省略時は回答を使い切るまで）
+
+    Returns:
+        dict: games（実行回数）, steps（回答数）, seconds（所要時間）, latencies（プロンプトごとの処理時間）
+    """
+    import main
+
+    # 作業ディレクトリは変えず、保存先を絶対パスで開く
+    workdir = os.path.abspath(workdir) if workdir else tempfile.mkdtemp(prefix="rpg-autoplay-")
+    os.makedirs(workdir, exist_ok=True)
+    main.open_storage(workdir)
+
+    scheduler.configure(headless=True)
+    set_output(output)
+    previous = set_input(provider)
+
+    games = 0
+    start = time.perf_counter()
+    try:
+        while max_games is None or games < max_games:
+            games += 1
+            main.game_loop()
+    except ScriptExhausted:
+        pass
+    finally:
+        seconds = time.perf_counter() - start
+        set_input(previous)
+        main.close_storage()
+
+    latencies = defaultdict(list)
+    for prompt, latency in provider.latencies:
+        latencies[prompt].append(latency)
+    return {"games": games, "steps": provider.steps, "seconds": seconds, "latencies": dict(latencies)}
+
+
+def print_report(report):
+    """プロンプトごとの処理時間を表示"""
+    print(f"game_loop: {report['games']}回 | 回答: {report['steps']}回 | {report['seconds']:.2f}秒")
+    print(f"{'件数':>8} {'平均ms':>9} {'p95ms':>9} {'最大ms':>9}  プロンプト")
+    for prompt, values in sorted(report["latencies"].items(), key=lambda item: -sum(item[1])):
+        p95 = statistics.quantiles(values, n=20, method="inclusive")[-1] if len(values) > 1 else values[0]
+        print(f"{len(values):>8} {statistics.fmean(values) * 1000:>9.3f} {p95 * 1000:>9.3f} "
+              f"{max(values) * 1000:>9.3f}  {Text.from_markup(prompt).plain.strip()}")
+
+
+def main():
+    """コマンドラインから実行"""
+    parser = argparse.ArgumentParser(description="game_loop をスクリプトで自動実行")
+    parser.add_argument("script", nargs="?", help="回答のスクリプトファイル（1行に1つ）")
+    parser.add_argument("--random", type=int, default=None, metavar="STEPS", help="ランダムな回答をSTEPS回行う")
+    parser.add_argument("--seed", type=int, default=None, help="ランダムな回答の乱数シード")
+    parser.add_argument("--output", choices=["null", "record", "terminal"], default="null", help="出力先")
+    parser.add_argument("--transcript", default=None, help="--output record の出力を書き出すファイル")
+    parser.add_argument("--workdir", default=None, help="セーブ・ログの保存先（省略時は一時ディレクトリ）")
+    parser.add_argument("--metrics", default=None, help="処理時間を計測して終了時に書き出すファイル（.json / .prom）")
+    args = parser.parse_args()
+
+    if args.metrics:
+        import metrics
+        metrics.enable(args.metrics)
+
+    if args.random is not None:
+        provider = RandomInput(random.Random(args.seed), steps=args.random)
+    elif args.script:
+        provider = ScriptedInput.from_file(os.path.abspath(args.script))
+    else:
+        parser.error("スクリプトファイルか --random を指定してください")
+
+    transcript = os.path.abspath(args.transcript) if args.transcript else None
+    report = run(provider, args.output, args.workdir)
+    if transcript is not None and args.output == "record":
+        with open(transcript, 'w', encoding='utf-8') as f:
+            f.write(recorded_output())
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
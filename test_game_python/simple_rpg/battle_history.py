@@ -0,0 +1,286 @@
+"""プレイヤーの戦闘履歴（列ごとの型付き配列）と逐次更新する集計
+
+1戦闘を1行として、敵の種類・敵のレベル・ターン数・与えたダメージ・受けたダメージ・
+使ったアイテム数・結果を列ごとの array に追記する（1戦闘あたり16バイト）。
+敵の種類は名前の一覧への番号で持つ。
+
+敵の種類ごとの勝率やレベルごとの平均ターン数は、追記のたびに更新する
+集計から答えるので、履歴を走査し直すことはない。
+
+セーブデータには BLOCK_ROWS 行ごとのブロックに分けて、列を zlib で圧縮した
+base64 の文字列として保存する。埋まったブロックの圧縮結果は使い回すので、
+セーブのたびに圧縮し直すのは最後のブロックだけになる。
+"""
+
+import base64
+import sys
+import zlib
+from array import array
+
+# 結果 -> 列に保存する番号
+OUTCOMES = ("victory", "defeat", "escaped")
+OUTCOME_CODES = {outcome: code for code, outcome in enumerate(OUTCOMES)}
+
+# 列名と型コード（H: 0〜65535, I: 0〜2^32-1, B: 0〜255）
+COLUMNS = (
+    ("enemy_type", "H"),
+    ("enemy_level", "H"),
+    ("turns", "H"),
+    ("damage_dealt", "I"),
+    ("damage_taken", "I"),
+    ("items_used", "B"),
+    ("outcome", "B"),
+)
+COLUMN_NAMES = tuple(name for name, _ in COLUMNS)
+
+BLOCK_ROWS = 4096  # セーブデータの1ブロックの行数
+
+
+def _encode_block(columns, start, stop):
+    """start〜stop-1 行目の列を圧縮したブロック [行数, base64] を作成"""
+    chunks = []
+    for column in columns:
+        part = column[start:stop]
+        if sys.byteorder != "little":
+            part.byteswap()
+        chunks.append(part.tobytes())
+    return [stop - start, base64.b64encode(zlib.compress(b"".join(chunks))).decode("ascii")]
+
+
+def _decode_blocks(columns, blocks):
+    """圧縮したブロックを展開して列に追記"""
+    for count, encoded in blocks:
+        raw = zlib.decompress(base64.b64decode(encoded))
+        offset = 0
+        for column in columns:
+            part = array(column.typecode)
+            size = part.itemsize * count
+            part.frombytes(raw[offset:offset + size])
+            if sys.byteorder != "little":
+                part.byteswap()
+            column.extend(part)
+            offset += size
+
+
+class BattleHistory:
+    """
+    1人のプレイヤーの戦闘履歴
+
+    行は追記のみで、saved より後の行が次の差分セーブで書き出される。
+    """
+
+    __slots__ = ("columns", "enemy_types", "saved", "_type_codes", "_by_enemy", "_by_level", "_blocks")
+
+    def __init__(self):
+        self.columns = tuple(array(typecode) for _, typecode in COLUMNS)
+        self.enemy_types = []  # 敵の種類の番号 -> 名前
+        self.saved = 0  # セーブ済みの行数（差分セーブ用）
+        self._type_codes = {}  # 名前 -> 番号
+        self._by_enemy = {}  # 敵の種類の番号 -> [戦闘数, 勝利数, 敗北数, 逃走数]
+        self._by_level = {}  # 敵のレベル -> [戦闘数, ターン数の合計]
+        self._blocks = []  # 埋まったブロックの圧縮結果（ブロック番号順）
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    def column(self, name):
+        """列を名前で取得"""
+        return self.columns[COLUMN_NAMES.index(name)]
+
+    def _type_code(self, enemy_name):
+        """敵の名前の番号を取得（初めての名前は一覧に追加）"""
+        code = self._type_codes.get(enemy_name)
+        if code is None:
+            code = self._type_codes[enemy_name] = len(self.enemy_types)
+            self.enemy_types.append(enemy_name)
+        return code
+
+    def append(self, enemy_name, enemy_level, turns, damage_dealt, damage_taken, items_used, outcome):
+        """
+        戦闘を1つ追記する（列の型の上限を超える値は上限に丸める）
+
+        Args:
+            enemy_name: 敵の名前
+            enemy_level: 敵のレベル
+            turns: ターン数
+            damage_dealt: 与えたダメージの合計
+            damage_taken: 受けたダメージの合計
+            items_used: 使ったアイテムの数
+            outcome: "victory" / "defeat" / "escaped"
+        """
+        code = self._type_code(enemy_name)
+        enemy_level = min(enemy_level, 0xFFFF)
+        turns = min(turns, 0xFFFF)
+        outcome_code = OUTCOME_CODES[outcome]
+
+        enemy_type_col, level_col, turns_col, dealt_col, taken_col, items_col, outcome_col = self.columns
+        enemy_type_col.append(code)
+        level_col.append(enemy_level)
+        turns_col.append(turns)
+        dealt_col.append(min(damage_dealt, 0xFFFFFFFF))
+        taken_col.append(min(damage_taken, 0xFFFFFFFF))
+        items_col.append(min(items_used, 0xFF))
+        outcome_col.append(outcome_code)
+
+        self._add_to_aggregates(code, enemy_level, turns, outcome_code)
+
+    def record(self, engine):
+        """終了したBattleEngineの戦闘を追記する"""
+        enemy = engine.enemy
+        self.append(enemy.name, enemy.level, engine.turn - 1, engine.damage_dealt, engine.damage_taken,
+                    engine.items_used, engine.result)
+
+    def _add_to_aggregates(self, code, enemy_level, turns, outcome_code):
+        """1戦闘を集計に加える"""
+        enemy = self._by_enemy.get(code)
+        if enemy is None:
+            enemy = self._by_enemy[code] = [0, 0, 0, 0]
+        enemy[0] += 1
+        enemy[1 + outcome_code] += 1
+
+        level = self._by_level.get(enemy_level)
+        if level is None:
+            level = self._by_level[enemy_level] = [0, 0]
+        level[0] += 1
+        level[1] += turns
+
+    def win_rate_by_enemy(self):
+        """
+        敵の種類ごとの戦績
+
+        Returns:
+            dict: 敵の名前 -> {"battles", "victories", "defeats", "escapes", "win_rate"}
+        """
+        return {
+            self.enemy_types[code]: {
+                "battles": battles, "victories": victories, "defeats": defeats, "escapes": escapes,
+                "win_rate": victories / battles,
+            }
+            for code, (battles, victories, defeats, escapes) in sorted(self._by_enemy.items())
+        }
+
+    def average_turns_by_level(self):
+        """
+        敵のレベルごとの平均ターン数
+
+        Returns:
+            dict: 敵のレベル -> 平均ターン数
+        """
+        return {level: turns / battles for level, (battles, turns) in sorted(self._by_level.items())}
+
+    def rows(self, start=0, stop=None):
+        """行を辞書で取得（表示・デバッグ用）"""
+        for values in zip(*(column[start:stop] for column in self.columns)):
+            row = dict(zip(COLUMN_NAMES, values))
+            row["enemy_type"] = self.enemy_types[row["enemy_type"]]
+            row["outcome"] = OUTCOMES[row["outcome"]]
+            yield row
+
+    def nbytes(self):
+        """列のメモリ上のバイト数"""
+        return sum(column.itemsize * len(column) for column in self.columns)
+
+    def to_save_data(self, start=0):
+        """
+        セーブデータ用の辞書に変換
+
+        Args:
+            start: 書き出す最初の行（差分セーブでは前回のセーブ以降の行だけを書き出す）
+
+        Returns:
+            dict: start, count, enemy_types, blocks（[行数, 圧縮した列のbase64] のリスト）
+        """
+        total = len(self)
+        blocks = []
+        position = start
+        while position < total:
+            block_index, offset = divmod(position, BLOCK_ROWS)
+            stop = min(total, (block_index + 1) * BLOCK_ROWS)
+            if offset == 0 and stop - position == BLOCK_ROWS:
+                # 埋まったブロックは一度だけ圧縮する
+                while len(self._blocks) <= block_index:
+                    first = len(self._blocks) * BLOCK_ROWS
+                    self._blocks.append(_encode_block(self.columns, first, first + BLOCK_ROWS))
+                blocks.append(self._blocks[block_index])
+            else:
+                blocks.append(_encode_block(self.columns, position, stop))
+            position = stop
+        return {"start": start, "count": total - start, "enemy_types": list(self.enemy_types), "blocks": blocks}
+
+    def take_delta(self):
+        """前回のセーブ以降の行をセーブデータ用の辞書で取得し、セーブ済みにする"""
+        data = self.to_save_data(self.saved)
+        self.saved = len(self)
+        return data
+
+    def extend_from_save_data(self, data):
+        """
+        セーブデータの行を追記する（集計も更新する）
+
+        Raises:
+            ValueError: 行の位置が現在の履歴の続きでない場合
+        """
+        if data["start"] != len(self):
+            raise ValueError(f"戦闘履歴の続きではありません: {data['start']} != {len(self)}")
+        for name in data["enemy_types"][len(self.enemy_types):]:
+            self._type_code(name)
+
+        first = len(self)
+        _decode_blocks(self.columns, data["blocks"])
+
+        enemy_type_col, level_col, turns_col, _, _, _, outcome_col = self.columns
+        for index in range(first, len(self)):
+            self._add_to_aggregates(enemy_type_col[index], level_col[index], turns_col[index], outcome_col[index])
+        self.saved = len(self)
+
+    @classmethod
+    def from_save_data(cls, data):
+        """セーブデータから復元（集計は1回の走査で作り直す）"""
+        history = cls()
+        history.extend_from_save_data(data)
+        return history
+
+
+def merge_history_data(older, newer):
+    """
+    セーブデータ上の2つの履歴を1つにまとめる
+
+    newer が先頭から書き出したものなら newer で置き換え、older の続きならブロックを連結する。
+
+    Raises:
+        ValueError: newer が older の続きでない場合
+    """
+    if newer["start"] == 0:
+        return newer
+    if newer["start"] != older["start"] + older["count"]:
+        raise ValueError(f"戦闘履歴の続きではありません: {newer['start']} != {older['start'] + older['count']}")
+    return {
+        "start": older["start"],
+        "count": older["count"] + newer["count"],
+        "enemy_types": newer["enemy_types"],
+        "blocks": older["blocks"] + newer["blocks"],
+    }
+
+
+def rebuild_history_data(data):
+    """
+    セーブデータ上の先頭からの履歴を BLOCK_ROWS 行ずつのブロックに詰め直す
+
+    merge_history_data で差分を連結すると数行だけのブロックが並ぶので、
+    ジャーナルを統合するときに使う。先頭から続く埋まったブロックはそのまま使い、
+    それ以降だけを展開して圧縮し直す。
+
+    Returns:
+        dict: 詰め直した履歴（詰め直す必要が無ければ data をそのまま返す）
+    """
+    blocks = data["blocks"]
+    kept = 0
+    while kept < len(blocks) and blocks[kept][0] == BLOCK_ROWS:
+        kept += 1
+    if data["start"] != 0 or kept >= len(blocks) - 1:
+        return data
+    columns = tuple(array(typecode) for _, typecode in COLUMNS)
+    _decode_blocks(columns, blocks[kept:])
+    total = len(columns[0])
+    rebuilt = [_encode_block(columns, first, min(total, first + BLOCK_ROWS)) for first in range(0, total, BLOCK_ROWS)]
+    return {**data, "blocks": blocks[:kept] + rebuilt}
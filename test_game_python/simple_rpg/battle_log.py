@@ -1,27 +1,127 @@
 """戦闘ログ管理クラス"""
 
+import json
+import uuid
 from collections import deque
-from rich.panel import Panel
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+
+class LogEntry(NamedTuple):
+    """戦闘ログの1件（BattleEngineのイベントから作られる）"""
+
+    message: str
+    style: str = "white"
+    turn: Optional[int] = None
+    actor: Optional[str] = None
+    action: Optional[str] = None
+    damage: Optional[int] = None
+    critical: bool = False
+    heal: Optional[int] = None
+
+
+class BattleJournal:
+    """
+    戦闘ログを追記専用のJSON Linesファイルに書き出すクラス
+
+    書き込みはバッファに溜めておき、batch_size件ごと（またはflush時）に
+    まとめてファイルへ追記する。
+    """
+
+    def __init__(self, path, batch_size=64):
+        """
+        Args:
+            path: ジャーナルファイルのパス
+            batch_size: まとめて書き込む件数
+        """
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self._buffer = []
+        self._file = None
+
+    def append(self, record):
+        """レコード（辞書）を1件追加"""
+        self._buffer.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """バッファの内容をファイルに書き込む"""
+        if not self._buffer:
+            return
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write("\n".join(self._buffer) + "\n")
+        self._file.flush()
+        self._buffer.clear()
+
+    def close(self):
+        """残りを書き込んでファイルを閉じる"""
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
 
 
 class BattleLog:
     """戦闘中のログメッセージを管理するクラス"""
 
-    def __init__(self, max_lines=10):
+    def __init__(self, max_lines=10, journal=None, battle_id=None):
+        """
+        Args:
+            max_lines: 画面に表示するログの行数
+            journal: 全てのログを書き出すBattleJournal（省略時は書き出さない）
+            battle_id: ジャーナルに記録する戦闘ID（省略時は自動生成）
+        """
         self.logs = deque(maxlen=max_lines)
+        self.version = 0  # ログが追加されるたびに増える（再描画の判定用）
+        self.journal = journal
+        self.battle_id = battle_id or uuid.uuid4().hex[:12]
+        self._rendered = None
+
+    def add(self, message, style="white", event=None):
+        """
+        ログメッセージを追加
 
-    def add(self, message, style="white"):
-        """ログメッセージを追加"""
-        self.logs.append((message, style))
+        Args:
+            message: 表示するメッセージ
+            style: 表示スタイル
+            event: 元になったBattleEngineのイベント（行動者・ダメージなどを記録する）
+        """
+        if event is None:
+            entry = LogEntry(message, style)
+        else:
+            entry = LogEntry(
+                message,
+                style,
+                turn=event.get("turn"),
+                actor=event.get("actor"),
+                action=event.get("type"),
+                damage=event.get("damage"),
+                critical=event.get("critical", False),
+                heal=event.get("amount") if event.get("type") == "heal" else None
+            )
+
+        self.logs.append(entry)
+        self.version += 1
+        self._rendered = None
+
+        if self.journal is not None:
+            self.journal.append({"battle": self.battle_id, **entry._asdict()})
 
     def render(self):
-        """ログをパネルとしてレンダリング"""
-        lines = []
-        for msg, style in self.logs:
-            lines.append(f"[{style}]• {msg}[/{style}]")
-        return Panel(
-            "\n".join(lines) if lines else "[dim]戦闘ログ[/dim]",
-            title="📜 ログ",
-            border_style="yellow",
-            height=12
-        )
+        """ログをパネルとしてレンダリング（次のaddまでは同じパネルを返す）"""
+        if self._rendered is None:
+            from rich.panel import Panel
+
+            lines = []
+            for entry in self.logs:
+                lines.append(f"[{entry.style}]• {entry.message}[/{entry.style}]")
+            self._rendered = Panel(
+                "\n".join(lines) if lines else "[dim]戦闘ログ[/dim]",
+                title="📜 ログ",
+                border_style="yellow",
+                height=12
+            )
+        return self._rendered
@@ -0,0 +1,463 @@
+"""ゲームのホットパスのベンチマーク（基準値との比較で性能の劣化を検出する）
+
+各ベンチマークは1回の処理（op）あたりの時間を、直前に計測した基準処理
+（REFERENCE_NUMBER 回のPythonのループ）の時間との比の最小値で比較する。
+比で比べるので、基準値（benchmarks_baseline.json）を作ったマシンと速さの異なる
+マシンでも比較できる。基準値より threshold % 以上遅くなったものがあれば
+終了コード1で終了する。
+
+使い方（simple_rpg ディレクトリで実行）:
+    python -m benchmarks                      # 基準値と比較（基準値が無ければ表示のみ）
+    python -m benchmarks --save-baseline      # 現在の結果を基準値として保存
+    python -m benchmarks --threshold 10 -k save
+"""
+
+import json
+import os
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks_baseline.json")
+DEFAULT_THRESHOLD = 20.0  # 劣化とみなす割合（%）
+REFERENCE_NUMBER = 10_000  # 基準処理のループ回数
+REFERENCE_REPEAT = 5  # 1回の計測で基準処理を実行する回数
+
+# 名前 -> (1回の計測で実行する回数, 計測する関数を用意するコンテキストマネージャー)
+BENCHMARKS = {}
+
+
+def benchmark(name, number):
+    """
+    ベンチマークを登録するデコレーター
+
+    登録する関数は、計測する処理（引数なしの関数）を yield するジェネレーター。
+    yield の前が準備、後が後片付けになる。
+
+    Args:
+        name: ベンチマーク名
+        number: 1回の計測で処理を実行する回数
+    """
+    def decorator(func):
+        BENCHMARKS[name] = (number, contextmanager(func))
+        return func
+    return decorator
+
+
+_devnull = None  # 出力を捨てるファイル（全てのベンチマークで使い回す）
+
+
+def _null_console():
+    """出力を捨てるコンソール（描画処理は端末と同じように行う）"""
+    global _devnull
+    from rich.console import Console
+    if _devnull is None:
+        _devnull = open(os.devnull, 'w', encoding='utf-8')
+    return Console(file=_devnull, force_terminal=True, width=100)
+
+
+def _player(level=1, items=None):
+    """ベンチマーク用のプレイヤー"""
+    from character import Character, START_HP, START_MP, START_ATTACK, START_DEFENSE
+    player = Character("勇者", START_HP, START_HP, START_MP, START_MP, START_ATTACK, START_DEFENSE, items=items)
+    if level > 1:
+        player.level_up(random.Random(level), count=level - 1)
+    return player
+
+
+@benchmark("combat.calculate_damage", number=100_000)
+def bench_calculate_damage():
+    from character import Character, NO_ITEMS
+    from combat import calculate_damage
+
+    rng = random.Random(1)
+    attacker = _player(level=20)
+    defender = Character("スライム", 50, 50, 0, 0, 30, 12, items=NO_ITEMS)
+    yield lambda: calculate_damage(attacker, defender, 1.5, rng)
+
+
+@benchmark("character.gain_exp.small", number=20_000)
+def bench_gain_exp_small():
+    rng = random.Random(1)
+    player = _player()
+    yield lambda: player.gain_exp(7, rng)
+
+
+@benchmark("character.gain_exp.large", number=2_000)
+def bench_gain_exp_large():
+    rng = random.Random(1)
+
+    def run():
+        # 毎回レベル1から、数百レベル分の経験値をまとめて獲得する
+        player = _player()
+        player.gain_exp(5_000_000, rng)
+    yield run
+
+
+@benchmark("battle.create_enemy", number=20_000)
+def bench_create_enemy():
+    from battle import create_enemy
+
+    rng = random.Random(1)
+    levels = [rng.randint(1, 200) for _ in range(1024)]
+    index = iter(range(10**9))
+    yield lambda: create_enemy(levels[next(index) & 1023], rng)
+
+
+@benchmark("ui.create_character_panel.render", number=200)
+def bench_character_panel():
+    from ui import create_character_panel, clear_panel_cache
+
+    console = _null_console()
+    player = _player(level=10)
+    hp = iter(range(10**9))
+
+    def run():
+        # HPを毎回変えてキャッシュに当たらないようにし、パネルの作成と描画を計測する
+        player.hp = 1 + next(hp) % player.max_hp
+        console.print(create_character_panel(player, True))
+    clear_panel_cache()
+    yield run
+
+
+@benchmark("battle_log.render", number=200)
+def bench_battle_log_render():
+    from battle_log import BattleLog
+
+    console = _null_console()
+    log = BattleLog()
+    event = {"type": "attack", "turn": 1, "actor": "勇者", "damage": 12, "critical": False}
+    turn = iter(range(10**9))
+
+    def run():
+        log.add(f"勇者 の攻撃! スライム に 12 ダメージ (ターン {next(turn)})", "cyan", event)
+        console.print(log.render())
+    yield run
+
+
+def _history(battles):
+    """ベンチマーク用の戦闘履歴"""
+    from battle_history import BattleHistory
+
+    rng = random.Random(1)
+    history = BattleHistory()
+    for _ in range(battles):
+        history.append(rng.choice(("スライム", "ゴブリン", "オーク")), rng.randint(1, 40), rng.randint(1, 12),
+                       rng.randint(0, 400), rng.randint(0, 200), rng.randint(0, 2),
+                       rng.choice(("victory", "victory", "escaped", "defeat")))
+    return history
+
+
+@benchmark("battle_history.append", number=50_000)
+def bench_history_append():
+    history = _history(0)
+    yield lambda: history.append("スライム", 12, 3, 140, 35, 1, "victory")
+
+
+def _save_system(directory, **options):
+    from save_system import SaveSystem
+    return SaveSystem(os.path.join(directory, "saves"), **options)
+
+
+@benchmark("save_system.save_game", number=100)
+def bench_save_game():
+    with tempfile.TemporaryDirectory() as directory:
+        system = _save_system(directory)
+        player = _player(level=30)
+        slot = iter(range(10**9))
+        yield lambda: system.save_game(player, 1 + next(slot) % 100)
+        system.close()
+
+
+@benchmark("save_system.save_game.large", number=30)
+def bench_save_game_large():
+    with tempfile.TemporaryDirectory() as directory:
+        system = _save_system(directory)
+        # 所持品の多い大きなセーブデータ
+        player = _player(level=30, items={f"アイテム{i}": i for i in range(5_000)})
+        yield lambda: system.save_game(player, 1)
+        system.close()
+
+
+@benchmark("save_system.save_game.history", number=30)
+def bench_save_game_history():
+    with tempfile.TemporaryDirectory() as directory:
+        system = _save_system(directory)
+        # 5万戦の戦闘履歴を持つプレイヤー（毎回1戦ずつ増やしてセーブする）
+        player = _player(level=30)
+        player.history = _history(50_000)
+        def run():
+            player.history.append("スライム", 12, 3, 140, 35, 1, "victory")
+            system.save_game(player, 1)
+        yield run
+        system.close()
+
+
+def _shipped_save_system(directory, serializer="json"):
+    """ゲーム（main.py）と同じ設定のセーブシステム（差分セーブ・バックグラウンド書き込み）"""
+    from main import SAVE_OPTIONS
+    return _save_system(directory, serializer=serializer, **SAVE_OPTIONS)
+
+
+def _play_one_battle(player, rng):
+    """1戦闘分の変化をプレイヤーに加える（オートセーブの差分になる項目）"""
+    player.take_damage(7)
+    player.heal(7)
+    player.gain_exp(3, rng)
+    player.history.append("スライム", player.level, 3, 140, 35, 0, "victory")
+    player.mark_changed("history")
+
+
+def _bench_shipped_save(serializer):
+    """ゲームと同じ設定で、1戦闘ごとのオートセーブ（ジャーナルへの追記と統合を含む）を計測"""
+    with tempfile.TemporaryDirectory() as directory:
+        system = _shipped_save_system(directory, serializer)
+        rng = random.Random(1)
+        player = _player(level=30)
+        player.history = _history(5_000)
+        system.save_game(player, 1)
+
+        def run():
+            _play_one_battle(player, rng)
+            system.save_game(player, 1)
+        yield run
+        system.close()
+
+
+def _bench_shipped_load(serializer):
+    """ゲームと同じ設定で、セーブファイルと差分のジャーナルからのロードを計測"""
+    with tempfile.TemporaryDirectory() as directory:
+        system = _shipped_save_system(directory, serializer)
+        rng = random.Random(1)
+        player = _player(level=30)
+        player.history = _history(5_000)
+        system.save_game(player, 1)
+        for _ in range(20):
+            _play_one_battle(player, rng)
+            system.save_game(player, 1, background=True)
+        system.flush()
+        yield lambda: system.load_game(1)
+        system.close()
+
+
+@benchmark("save_system.save_game.shipped", number=200)
+def bench_save_game_shipped():
+    yield from _bench_shipped_save("json")
+
+
+@benchmark("save_system.save_game.shipped_binary", number=200)
+def bench_save_game_shipped_binary():
+    yield from _bench_shipped_save("binary")
+
+
+@benchmark("save_system.load_game.shipped", number=200)
+def bench_load_game_shipped():
+    yield from _bench_shipped_load("json")
+
+
+@benchmark("save_system.load_game.shipped_binary", number=200)
+def bench_load_game_shipped_binary():
+    yield from _bench_shipped_load("binary")
+
+
+@benchmark("save_system.load_game", number=1_000)
+def bench_load_game():
+    with tempfile.TemporaryDirectory() as directory:
+        system = _save_system(directory)
+        player = _player(level=30)
+        for slot in range(1, 101):
+            system.save_game(player, slot)
+        slot = iter(range(10**9))
+        yield lambda: system.load_game(1 + next(slot) % 100)
+        system.close()
+
+
+@benchmark("save_system.load_game.large", number=50)
+def bench_load_game_large():
+    with tempfile.TemporaryDirectory() as directory:
+        system = _save_system(directory)
+        system.save_game(_player(level=30, items={f"アイテム{i}": i for i in range(5_000)}), 1)
+        yield lambda: system.load_game(1)
+        system.close()
+
+
+@benchmark("save_system.list_saves.many", number=1_000)
+def bench_list_saves():
+    with tempfile.TemporaryDirectory() as directory:
+        system = _save_system(directory)
+        player = _player(level=30)
+        for slot in range(1, 201):
+            system.save_game(player, slot)
+        yield lambda: system.list_saves(200)
+        system.close()
+
+
+def _reference():
+    """マシンの速さの目安にする基準処理（ゲームのコードに依存しない、辞書と整数演算のループ）"""
+    table = {}
+    for i in range(REFERENCE_NUMBER):
+        table[i & 255] = table.get(i & 255, 0) + i * 3 % 7
+
+
+def _per_op(func, number):
+    """func を number 回実行して1回あたりのマイクロ秒を返す"""
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    return (time.perf_counter() - start) / number * 1e6
+
+
+def measure_reference(repeat=5):
+    """基準処理1回あたりのマイクロ秒（最小値）"""
+    _reference()
+    return min(_per_op(_reference, REFERENCE_REPEAT) for _ in range(repeat))
+
+
+def measure(name, repeat=5):
+    """
+    ベンチマークを1つ計測
+
+    マシンの速さは実行中にも変わるので、計測ごとに直前に基準処理を計測し、
+    その比の最小値を relative とする。
+
+    Args:
+        name: ベンチマーク名
+        repeat: 計測する回数（最小値を結果とする）
+
+    Returns:
+        dict: per_op_us（1回あたりのマイクロ秒の最小値）, median_us, number, repeat,
+              relative（基準処理の時間に対する比）
+    """
+    number, setup = BENCHMARKS[name]
+    times = []
+    ratios = []
+    with setup() as func:
+        func()  # 初回のみの処理（import・キャッシュの作成）を除く
+        _reference()
+        for _ in range(repeat):
+            reference_us = _per_op(_reference, REFERENCE_REPEAT)
+            per_op_us = _per_op(func, number)
+            times.append(per_op_us)
+            ratios.append(per_op_us / reference_us)
+    times.sort()
+    return {
+        "per_op_us": times[0], "median_us": times[len(times) // 2], "number": number, "repeat": repeat,
+        "relative": min(ratios),
+    }
+
+
+def run(names=None, repeat=5):
+    """
+    ベンチマークをまとめて計測
+
+    Args:
+        names: 計測するベンチマーク名のリスト（省略時は全て）
+        repeat: 各ベンチマークの計測回数
+
+    Returns:
+        tuple: (ベンチマーク名 -> measure の結果, 基準処理のマイクロ秒（表示用）)
+    """
+    results = {name: measure(name, repeat) for name in names or BENCHMARKS}
+    return results, measure_reference(repeat)
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    計測結果を基準値と比較（基準処理の時間に対する比で比べる）
+
+    Args:
+        results: run の戻り値の1つ目
+        baseline: 基準値（ベンチマーク名 -> {"relative": ...}）
+        threshold: 劣化とみなす割合（%）
+
+    Returns:
+        list: (ベンチマーク名, 基準値の比, 今回の比, 今回μs, 変化率%, 劣化したか) のリスト
+              （基準値の無いもの・比を含まない古い基準値は変化率None）
+    """
+    rows = []
+    for name, result in results.items():
+        base = baseline.get(name, {}).get("relative")
+        if base is None:
+            rows.append((name, None, result["relative"], result["per_op_us"], None, False))
+            continue
+        change = (result["relative"] / base - 1) * 100
+        rows.append((name, base, result["relative"], result["per_op_us"], change, change > threshold))
+    return rows
+
+
+def load_baseline(path=DEFAULT_BASELINE):
+    """基準値を読み込む（ファイルが無ければ空）"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)["benchmarks"]
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(results, reference_us, path=DEFAULT_BASELINE):
+    """計測結果を基準値として保存（既存の基準値のうち今回計測しなかったものは残す）"""
+    import platform
+
+    benchmarks = load_baseline(path)
+    benchmarks.update(results)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "reference_us": reference_us,  # 参考用（比較には relative を使う）
+            "benchmarks": dict(sorted(benchmarks.items())),
+        }, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def print_report(rows, threshold, reference_us):
+    """比較結果を表示（比は基準処理の時間を1とした値）"""
+    print(f"基準処理: {reference_us:.1f}μs")
+    print(f"{'ベンチマーク':<34} {'基準比':>10} {'今回比':>10} {'今回μs':>10} {'変化':>8}")
+    for name, base, current, current_us, change, regressed in rows:
+        base_text = f"{base:.5f}" if base is not None else "-"
+        change_text = f"{change:+.1f}%" if change is not None else "新規"
+        mark = f"  ✗ {threshold:g}%を超えて劣化" if regressed else ""
+        print(f"{name:<34} {base_text:>10} {current:>10.5f} {current_us:>10.2f} {change_text:>8}{mark}")
+
+
+def main():
+    """コマンドラインから実行"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="ホットパスのベンチマークを実行して基準値と比較")
+    parser.add_argument("-k", dest="pattern", default=None, help="名前にこの文字列を含むベンチマークだけを実行")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="各ベンチマークの計測回数")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="劣化とみなす割合（%%）")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基準値のJSONファイル")
+    parser.add_argument("--save-baseline", action="store_true", help="今回の結果を基準値として保存")
+    parser.add_argument("--list", action="store_true", help="ベンチマークの一覧を表示")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, (number, _) in BENCHMARKS.items():
+            print(f"{name}  (×{number})")
+        return
+
+    names = [name for name in BENCHMARKS if args.pattern is None or args.pattern in name]
+    if not names:
+        parser.error(f"該当するベンチマークがありません: {args.pattern}")
+
+    results, reference_us = run(names, args.repeat)
+    rows = compare(results, load_baseline(args.baseline), args.threshold)
+    print_report(rows, args.threshold, reference_us)
+
+    if args.save_baseline:
+        save_baseline(results, reference_us, args.baseline)
+        print(f"基準値を保存しました: {args.baseline}")
+        return
+
+    regressions = [row[0] for row in rows if row[5]]
+    if regressions:
+        print(f"劣化: {len(regressions)}件 ({', '.join(regressions)})")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,108 @@
 """キャラクタークラスの定義"""
 
+import random
+from bisect import bisect_right
+from itertools import product
+from types import MappingProxyType
+
+import metrics
+
+# レベルアップ時のステータス上昇量の範囲
+HP_GAIN_RANGE = (8, 12)
+MP_GAIN_RANGE = (3, 7)
+ATTACK_GAIN_RANGE = (2, 4)
+DEFENSE_GAIN_RANGE = (1, 3)
+
+# 上昇量 (HP, MP, 攻撃力, 防御力) の全組み合わせ（1回の抽選で4つまとめて決めるため）
+_GAIN_COMBINATIONS = list(product(
+    *(range(low, high + 1) for low, high in (HP_GAIN_RANGE, MP_GAIN_RANGE, ATTACK_GAIN_RANGE, DEFENSE_GAIN_RANGE))
+))
+
+# 新規ゲームのプレイヤーの初期ステータス (HP, MP, 攻撃力, 防御力)
+START_HP, START_MP, START_ATTACK, START_DEFENSE = 100, 50, 25, 10
+
+# 経験値テーブル
+# _EXP_TO_NEXT[level]: level から次のレベルまでに必要な経験値
+# _CUMULATIVE_EXP[level]: レベル1から level に到達するまでの累計経験値
+_EXP_TO_NEXT = [0]
+_CUMULATIVE_EXP = [0, 0]
+
+
+def _extend_exp_table(level):
+    """経験値テーブルを level まで拡張"""
+    while len(_EXP_TO_NEXT) <= level:
+        next_level = len(_EXP_TO_NEXT)
+        _EXP_TO_NEXT.append(int(100 * (1.5 ** (next_level - 1))))
+        _CUMULATIVE_EXP.append(_CUMULATIVE_EXP[-1] + _EXP_TO_NEXT[-1])
+
+
+def exp_to_next_level(level):
+    """指定レベルから次のレベルまでに必要な経験値を取得"""
+    if level >= len(_EXP_TO_NEXT):
+        _extend_exp_table(level)
+    return _EXP_TO_NEXT[level]
+
+
+def level_for_total_exp(total_exp):
+    """
+    累計経験値から到達レベルを二分探索で求める
+
+    Args:
+        total_exp: レベル1からの累計経験値
+
+    Returns:
+        tuple: (レベル, そのレベル内の経験値)
+    """
+    while _CUMULATIVE_EXP[-1] <= total_exp:
+        _extend_exp_table(len(_EXP_TO_NEXT))
+    level = bisect_right(_CUMULATIVE_EXP, total_exp) - 1
+    return level, total_exp - _CUMULATIVE_EXP[level]
+
+
+_extend_exp_table(100)
+
+
+# レベルアップで変化するフィールド（差分セーブ用）
+LEVEL_UP_FIELDS = ("level", "max_hp", "max_mp", "attack", "defense", "hp", "mp")
+
+def average_player_stats(level):
+    """
+    指定レベルのプレイヤーの平均的なステータスを取得
+    （初期ステータスにレベルアップ時の上昇量の期待値を加算）
+
+    Args:
+        level: プレイヤーレベル
+
+    Returns:
+        dict: hp, mp, attack, defense
+    """
+    gained = level - 1
+    return {
+        "hp": START_HP + sum(HP_GAIN_RANGE) // 2 * gained,
+        "mp": START_MP + sum(MP_GAIN_RANGE) // 2 * gained,
+        "attack": START_ATTACK + sum(ATTACK_GAIN_RANGE) // 2 * gained,
+        "defense": START_DEFENSE + sum(DEFENSE_GAIN_RANGE) // 2 * gained,
+    }
+
+
+# アイテムを持たないキャラクター（敵）で共有する空の所持品
+NO_ITEMS = MappingProxyType({})
+
 
 class Character:
     """ゲームキャラクター（プレイヤー・敵）を表すクラス"""
 
-    def __init__(self, name, hp, max_hp, mp, max_mp, attack, defense, level=1):
+    __slots__ = (
+        "name", "hp", "max_hp", "mp", "max_mp", "attack", "defense", "level",
+        "exp", "exp_to_next", "items", "total_battles", "total_victories", "exp_reward", "changes", "history",
+    )
+
+    def __init__(self, name, hp, max_hp, mp, max_mp, attack, defense, level=1, items=None, exp_reward=0):
+        """
+        Args:
+            items: 所持アイテムの辞書（省略時は初期アイテム、敵は NO_ITEMS を渡す）
+            exp_reward: 倒したときに得られる経験値（敵用）
+        """
         self.name = name
         self.hp = hp
         self.max_hp = max_hp
@@ -15,9 +113,17 @@ class Character:
         self.level = level
         self.exp = 0
         self.exp_to_next = self.calculate_exp_to_next()
-        self.items = {"回復薬": 3, "魔法の水": 2}
+        self.items = {"回復薬": 3, "魔法の水": 2} if items is None else items
         self.total_battles = 0
         self.total_victories = 0
+        self.exp_reward = exp_reward
+        self.changes = None  # 変更されたフィールド名の集合（差分セーブ用、Noneなら記録しない）
+        self.history = None  # 戦闘履歴（BattleHistory、最初の戦闘の記録時に作成）
+
+    def mark_changed(self, *fields):
+        """フィールドが変更されたことを記録（差分セーブが有効な場合のみ）"""
+        if self.changes is not None:
+            self.changes.update(fields)
 
     def is_alive(self):
         """キャラクターが生存しているかチェック"""
@@ -26,52 +132,115 @@ class Character:
     def take_damage(self, damage):
         """ダメージを受ける"""
         self.hp = max(0, self.hp - damage)
+        if self.changes is not None:
+            self.changes.add("hp")
 
     def heal(self, amount):
         """HPを回復する"""
         self.hp = min(self.max_hp, self.hp + amount)
+        if self.changes is not None:
+            self.changes.add("hp")
 
     def use_mp(self, amount):
         """MPを消費する（成功/失敗を返す）"""
         if self.mp >= amount:
             self.mp -= amount
+            if self.changes is not None:
+                self.changes.add("mp")
             return True
         return False
 
     def restore_mp(self, amount):
         """MPを回復する"""
         self.mp = min(self.max_mp, self.mp + amount)
+        if self.changes is not None:
+            self.changes.add("mp")
+
+    def use_item(self, name):
+        """アイテムを1つ消費する（成功/失敗を返す）"""
+        if self.items.get(name, 0) <= 0:
+            return False
+        self.items[name] -= 1
+        if self.changes is not None:
+            self.changes.add("items")
+        return True
+
+    def record_battle(self, engine):
+        """終了した戦闘を戦闘履歴に記録する"""
+        if self.history is None:
+            from battle_history import BattleHistory
+            self.history = BattleHistory()
+        self.history.record(engine)
+        if self.changes is not None:
+            self.changes.add("history")
+
+    def rest(self):
+        """休憩してHP・MPを全回復する"""
+        self.hp = self.max_hp
+        self.mp = self.max_mp
+        if self.changes is not None:
+            self.changes.update(("hp", "mp"))
 
     def calculate_exp_to_next(self):
-        """次のレベルまでに必要な経験値を計算"""
-        return int(100 * (1.5 ** (self.level - 1)))
+        """次のレベルまでに必要な経験値を計算（経験値テーブルを参照）"""
+        return exp_to_next_level(self.level)
     
-    def gain_exp(self, amount):
-        """経験値を獲得してレベルアップ判定"""
+    def gain_exp(self, amount, rng=None):
+        """
+        経験値を獲得してレベルアップ判定
+        （累計経験値テーブルの二分探索で、何レベル上がっても一度に処理する）
+        
+        Args:
+            amount: 獲得経験値
+            rng: 乱数生成器（省略時はrandomモジュール）
+        
+        Returns:
+            list: レベルアップ1回ごとの上昇量の辞書のリスト
+        """
+        if metrics.enabled:
+            metrics.count("gain_exp")
         self.exp += amount
-        level_ups = []
+        if self.changes is not None:
+            self.changes.add("exp")
+        if self.exp < self.exp_to_next:
+            return []
         
-        while self.exp >= self.exp_to_next:
-            self.exp -= self.exp_to_next
-            level_ups.append(self.level_up())
+        total_exp = _CUMULATIVE_EXP[self.level] + self.exp
+        new_level, self.exp = level_for_total_exp(total_exp)
         
-        return level_ups
+        return self.level_up(rng, count=new_level - self.level)
     
-    def level_up(self):
-        """レベルアップ処理"""
-        import random
-        self.level += 1
+    def level_up(self, rng=None, count=None):
+        """
+        レベルアップ処理
+        
+        Args:
+            rng: 乱数生成器（省略時はrandomモジュール）
+            count: 上げるレベル数（省略時は1レベルで、上昇量の辞書を1つ返す）
+        
+        Returns:
+            dict / list: 上昇量の辞書（countを指定した場合はそのリスト）
+        """
+        rng = rng or random
+        levels = 1 if count is None else count
         
-        # ステータス上昇量
-        hp_gain = random.randint(8, 12)
-        mp_gain = random.randint(3, 7)
-        attack_gain = random.randint(2, 4)
-        defense_gain = random.randint(1, 3)
+        # 全レベル分のステータス上昇量を1回の抽選でまとめて決める
+        gains = rng.choices(_GAIN_COMBINATIONS, k=levels)
         
-        self.max_hp += hp_gain
-        self.max_mp += mp_gain
-        self.attack += attack_gain
-        self.defense += defense_gain
+        level_ups = []
+        for hp_gain, mp_gain, attack_gain, defense_gain in gains:
+            self.level += 1
+            self.max_hp += hp_gain
+            self.max_mp += mp_gain
+            self.attack += attack_gain
+            self.defense += defense_gain
+            level_ups.append({
+                "level": self.level,
+                "hp_gain": hp_gain,
+                "mp_gain": mp_gain,
+                "attack_gain": attack_gain,
+                "defense_gain": defense_gain
+            })
         
         # レベルアップ時は全回復
         self.hp = self.max_hp
@@ -79,14 +248,11 @@ class Character:
         
         # 次のレベルまでの経験値を再計算
         self.exp_to_next = self.calculate_exp_to_next()
+
+        if self.changes is not None:
+            self.changes.update(LEVEL_UP_FIELDS)
         
-        return {
-            "level": self.level,
-            "hp_gain": hp_gain,
-            "mp_gain": mp_gain,
-            "attack_gain": attack_gain,
-            "defense_gain": defense_gain
-        }
+        return level_ups[0] if count is None else level_ups
     
     @classmethod
     def from_save_data(cls, save_data):
@@ -94,7 +260,7 @@ class Character:
         セーブデータからCharacterオブジェクトを復元
         
         Args:
-            save_data: ロードしたプレイヤーデータの辞書
+            save_data: ロードしたプレイヤーデータの辞書（現在のスキーマに移行済み）
         
         Returns:
             Character: 復元されたプレイヤー
@@ -112,9 +278,11 @@ class Character:
         
         # 追加の属性を復元
         player.exp = save_data["exp"]
-        player.exp_to_next = save_data["exp_to_next"]
         player.items = save_data["items"]
         player.total_battles = save_data["total_battles"]
         player.total_victories = save_data["total_victories"]
+        if save_data.get("history"):
+            from battle_history import BattleHistory
+            player.history = BattleHistory.from_save_data(save_data["history"])
         
         return player
@@ -1,42 +1,84 @@
 """戦闘ロジック関連の関数"""
 
 import random
-import time
-from rich.console import Console
-from rich.panel import Panel
 
-console = Console()
+import metrics
+
+# 魔法データ (番号, 名前, 消費MP, 効果, 倍率)
+MAGIC_LIST = [
+    ("1", "ファイア", 10, "敵に炎属性ダメージ", 1.5),
+    ("2", "ヒール", 15, "HPを30回復", 0),
+    ("3", "サンダー", 20, "敵に雷属性ダメージ", 2.0),
+]
+
+# アイテムデータ (番号, 名前, 効果)
+ITEM_LIST = [
+    ("1", "回復薬", "HP 50回復"),
+    ("2", "魔法の水", "MP 20回復"),
+]
+
+HEAL_MAGIC_AMOUNT = 30  # ヒールの回復量
+POTION_HEAL_AMOUNT = 50  # 回復薬の回復量
+ETHER_MP_AMOUNT = 20  # 魔法の水のMP回復量
+
+CRITICAL_RATE = 0.15  # クリティカル率
+CRITICAL_MULTIPLIER = 1.5  # クリティカル時のダメージ倍率
 
 
 def animate_attack(attacker_name, target_name, damage):
     """攻撃アニメーションを表示"""
+    from animation import scheduler
+    from game_io import console
+
     frames = [
         f"[yellow]{attacker_name}[/yellow] が構える...",
         f"[yellow]{attacker_name}[/yellow] の攻撃!",
         f"[red]⚔️ {damage}ダメージ![/red]",
     ]
 
-    for frame in frames:
-        console.print(frame)
-        time.sleep(0.4)
+    scheduler.play(((frame, 0.4) for frame in frames), console.print)
 
 
-def calculate_damage(attacker, defender, skill_multiplier=1.0):
+def calculate_damage(attacker, defender, skill_multiplier=1.0, rng=None):
     """ダメージ計算（クリティカルヒット判定含む）"""
+    if metrics.enabled:
+        metrics.count("calculate_damage")
+    rng = rng or random
     base_damage = attacker.attack * skill_multiplier
     defense_reduction = defender.defense * 0.5
     damage = int(max(1, base_damage - defense_reduction))
 
     # クリティカルヒット判定
-    is_critical = random.random() < 0.15
+    is_critical = rng.random() < CRITICAL_RATE
     if is_critical:
-        damage = int(damage * 1.5)
+        damage = int(damage * CRITICAL_MULTIPLIER)
 
     return damage, is_critical
 
 
+def damage_table(attack, defense, skill_multiplier=1.0):
+    """
+    calculate_damage と同じ式で (通常, クリティカル) のダメージを計算
+
+    Args:
+        attack: 攻撃側の攻撃力
+        defense: 防御側の防御力
+        skill_multiplier: 技の倍率
+
+    Returns:
+        tuple: (通常ダメージ, クリティカルダメージ)
+    """
+    damage = int(max(1, attack * skill_multiplier - defense * 0.5))
+    return damage, int(damage * CRITICAL_MULTIPLIER)
+
+
 def show_damage_effect(damage, is_critical):
     """ダメージエフェクトを表示"""
+    from rich.panel import Panel
+
+    from animation import scheduler
+    from game_io import console
+
     if is_critical:
         console.print(
             Panel(
@@ -46,4 +88,4 @@ def show_damage_effect(damage, is_critical):
         )
     else:
         console.print(f"[red]⚔️ {damage} ダメージ![/red]")
-    time.sleep(0.8)
+    scheduler.wait(0.8)
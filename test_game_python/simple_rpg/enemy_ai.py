@@ -0,0 +1,152 @@
+"""探索による敵AI（深さ制限付きexpectimax）
+
+敵の手番では各行動について、calculate_damage の通常/クリティカルの分布と
+プレイヤーの行動（markov の行動選択でモデル化）を確率ノードとして展開し、
+プレイヤーを倒す確率の見積もりが最大になる行動を選ぶ。
+
+探索は深さ1から反復深化で行い、持ち時間（または探索ノード数の上限）を
+超えた時点で打ち切って、最後に読み切った深さの結果を使う。評価値は
+(ステータス, 状態, 深さ) をキーとする置換表に保存し、同じ敵・プレイヤーの
+組み合わせの戦闘（同時に行われている他の戦闘も含む）で再利用する。
+"""
+
+import math
+import time
+from collections import OrderedDict
+
+from engine import ENEMY_ACTIONS, DEFAULT_ENEMY_POLICY
+from markov import ESCAPE, BattleModel, grind_policy
+
+
+class _SearchTimeout(Exception):
+    """持ち時間・ノード数の上限に達した"""
+
+
+class ExpectimaxPolicy:
+    """
+    深さ制限付きexpectimaxで敵の行動を選ぶ敵AI
+
+    BattleEngine の enemy_policy に渡して使う。乱数は使わないので、
+    戦闘の乱数の流れには影響しない。
+    """
+
+    def __init__(self, max_depth=6, time_budget=0.002, node_budget=None, player_policy=grind_policy,
+                 cache_size=200_000):
+        """
+        Args:
+            max_depth: 先読みする敵の手番の数の上限
+            time_budget: 1回の行動選択の持ち時間（秒、Noneなら時間で打ち切らない）
+            node_budget: 1回の行動選択で展開するノード数の上限
+                （時間に依存せず同じ結果にしたい場合に使う）
+            player_policy: プレイヤーの行動のモデル（markov の行動選択）
+            cache_size: 置換表に保存する評価値の最大数
+        """
+        self.max_depth = max_depth
+        self.time_budget = time_budget
+        self.node_budget = node_budget
+        self.player_policy = player_policy
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # (BattleModel, 状態, 深さ) -> 評価値
+        self._models = {}  # ステータス -> BattleModel
+        self._deadline = None
+        self._nodes = 0
+        self.last_depth = 0  # 直前の行動選択で読み切った深さ
+
+    def _model(self, engine):
+        """プレイヤーと敵のステータスに対応するBattleModelを取得（ステータスが同じなら共有）"""
+        player, enemy = engine.player, engine.enemy
+        key = (player.max_hp, player.max_mp, player.attack, player.defense, enemy.attack, enemy.defense)
+        model = self._models.get(key)
+        if model is None:
+            if len(self._models) >= 1024:
+                # 置換表のキーは BattleModel を含むので一緒に破棄する
+                self._models.clear()
+                self._cache.clear()
+            model = self._models[key] = BattleModel(player, enemy, self.player_policy)
+        return model
+
+    def choose(self, engine):
+        """敵の行動を選ぶ"""
+        model = self._model(engine)
+        state = model.start_state(engine.player, engine.enemy)
+
+        self._deadline = None if self.time_budget is None else time.perf_counter() + self.time_budget
+        self._nodes = 0
+        best = None
+        self.last_depth = 0
+        for depth in range(1, self.max_depth + 1):
+            try:
+                # 評価値が同じなら与えるダメージの期待値が大きい行動を選ぶ
+                best = max(ENEMY_ACTIONS, key=lambda action: (
+                    self._action_value(model, state, action, depth),
+                    sum(d * p for d, p in model.enemy_action_damage[action])
+                ))
+            except _SearchTimeout:
+                break
+            self.last_depth = depth
+
+        if best is None:
+            # 深さ1も読み切れなかった場合は既定の敵AIに任せる
+            return DEFAULT_ENEMY_POLICY.choose(engine)
+        return best
+
+    def _tick(self):
+        """展開したノードを数え、上限を超えていれば探索を打ち切る"""
+        self._nodes += 1
+        if self.node_budget is not None and self._nodes > self.node_budget:
+            raise _SearchTimeout
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise _SearchTimeout
+
+    def _action_value(self, model, state, action, depth):
+        """敵が action を選んだ場合にプレイヤーを倒す確率の見積もり"""
+        value = 0.0
+        for damage, p in model.enemy_action_damage[action]:
+            hp = state.player_hp - damage
+            value += p * (1.0 if hp <= 0 else self._player_value(model, state._replace(player_hp=hp), depth - 1))
+        return value
+
+    def _enemy_value(self, model, state, depth):
+        """敵の手番の状態の評価値（行動の最大値）"""
+        key = (model, state, depth)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+
+        self._tick()
+        value = max(self._action_value(model, state, action, depth) for action in ENEMY_ACTIONS)
+
+        self._cache[key] = value
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return value
+
+    def _player_value(self, model, state, depth):
+        """プレイヤーの手番の状態の評価値（プレイヤーの行動の結果の期待値）"""
+        if depth == 0:
+            return self._evaluate(model, state)
+
+        value = 0.0
+        for p, after in model.player_outcomes(state):
+            if after == ESCAPE or after.enemy_hp <= 0:
+                continue  # 逃げられた・倒された場合はプレイヤーを倒せない
+            value += p * self._enemy_value(model, after, depth)
+        return value
+
+    def _evaluate(self, model, state):
+        """
+        先読みを打ち切った状態の評価値
+
+        お互いの平均ダメージで相手を倒すまでのターン数を比べ、
+        プレイヤーを倒す確率の目安とする（プレイヤーが先に行動する）。
+        """
+        player_damage = sum(d * p for d, p in model.attack_damage)
+        enemy_damage = sum(d * p for d, p in model.enemy_damage)
+        turns_to_win = math.ceil(state.player_hp / enemy_damage)
+        turns_to_lose = math.ceil(state.enemy_hp / player_damage)
+        return turns_to_lose / (turns_to_win + turns_to_lose)
+
+    def cache_info(self):
+        """置換表の使用状況"""
+        return {"entries": len(self._cache), "models": len(self._models)}
@@ -0,0 +1,184 @@
+"""敵データの登録・生成（enemies.json から一度だけ読み込む）"""
+
+import json
+import os
+import random
+
+from character import Character, NO_ITEMS
+
+DEFAULT_DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "enemies.json")
+PRECOMPUTED_LEVELS = 100  # 読み込み時にステータスを計算しておくレベル数
+
+
+class AliasTable:
+    """
+    重み付き抽選をO(1)で行うための別名テーブル（Vose の alias method）
+    """
+
+    __slots__ = ("values", "prob", "alias")
+
+    def __init__(self, values, weights):
+        """
+        Args:
+            values: 抽選対象のリスト
+            weights: 各対象の重み（正の数）
+        """
+        n = len(values)
+        total = sum(weights)
+        scaled = [w * n / total for w in weights]
+        self.values = list(values)
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s = small.pop()
+            g = large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = g
+            scaled[g] = scaled[g] + scaled[s] - 1.0
+            (small if scaled[g] < 1.0 else large).append(g)
+
+    def sample(self, rng):
+        """1つ抽選する"""
+        if len(self.values) == 1:
+            return self.values[0]
+        i = int(rng.random() * len(self.values))
+        return self.values[i] if rng.random() < self.prob[i] else self.values[self.alias[i]]
+
+
+class EnemyRegistry:
+    """
+    敵の種類とレベル別ステータス、出現テーブルを管理するクラス
+
+    敵のステータスは (種類, レベル) ごとに事前計算しておき、
+    出現する敵は AliasTable で定数時間で抽選する。
+    """
+
+    def __init__(self, data):
+        """
+        Args:
+            data: enemies.json と同じ形式の辞書
+        """
+        self.level_scaling = data.get("level_scaling", 0.1)
+        self.types = data["enemies"]
+        self._index = {enemy["name"]: i for i, enemy in enumerate(self.types)}
+
+        # _stats[種類番号][レベル] = (hp, attack, defense, exp_reward)
+        self._stats = [[None] for _ in self.types]
+        self._extend_stats(PRECOMPUTED_LEVELS)
+
+        # 出現テーブル（max_level の小さい順、最後の1つは上限なし）
+        self._encounters = []
+        band_limits = []
+        for band in data["encounters"]:
+            names = list(band["weights"])
+            self._encounters.append(AliasTable(
+                [self._index[name] for name in names],
+                [band["weights"][name] for name in names]
+            ))
+            band_limits.append(band["max_level"])
+
+        # _band_by_level[レベル] = 出現テーブルの番号
+        max_band_level = max((limit for limit in band_limits if limit is not None), default=0)
+        self._band_by_level = [0]
+        band = 0
+        for level in range(1, max_band_level + 2):
+            while band_limits[band] is not None and level > band_limits[band]:
+                band += 1
+            self._band_by_level.append(band)
+
+    @classmethod
+    def load(cls, path=DEFAULT_DATA_FILE):
+        """データファイルから読み込む"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def _extend_stats(self, level):
+        """ステータス表を level まで計算"""
+        for enemy, table in zip(self.types, self._stats):
+            for lv in range(len(table), level + 1):
+                level_modifier = 1 + (lv - 1) * self.level_scaling
+                table.append((
+                    int(enemy["hp_base"] * level_modifier),
+                    int(enemy["attack_base"] * level_modifier),
+                    int(enemy["defense_base"] * level_modifier),
+                    int(enemy["exp"] * level_modifier),
+                ))
+
+    def type_index(self, name):
+        """敵の名前から種類番号を取得"""
+        return self._index[name]
+
+    def stats(self, type_index, player_level):
+        """
+        プレイヤーレベルに応じて調整済みの敵のステータスを取得
+
+        Args:
+            type_index: 敵の種類番号
+            player_level: プレイヤーのレベル
+
+        Returns:
+            tuple: (hp, attack, defense, exp_reward)
+        """
+        table = self._stats[type_index]
+        if player_level >= len(table):
+            self._extend_stats(player_level)
+        return table[player_level]
+
+    def stats_dict(self, type_index, player_level):
+        """ステータスを辞書で取得（name, hp, attack, defense, exp_reward）"""
+        hp, attack, defense, exp_reward = self.stats(type_index, player_level)
+        return {
+            "name": self.types[type_index]["name"],
+            "hp": hp,
+            "attack": attack,
+            "defense": defense,
+            "exp_reward": exp_reward,
+        }
+
+    def choose_type(self, player_level, rng=None):
+        """プレイヤーのレベルに応じて出現する敵の種類番号を抽選"""
+        bands = self._band_by_level
+        band = bands[player_level] if player_level < len(bands) else bands[-1]
+        return self._encounters[band].sample(rng or random)
+
+    def enemy_level(self, player_level, rng=None):
+        """敵のレベルを決定（プレイヤーレベル-1 の前後1）"""
+        return max(1, player_level - 1 + (rng or random).randint(-1, 1))
+
+    def create_enemy(self, player_level, rng=None):
+        """プレイヤーのレベルに応じた敵を生成"""
+        rng = rng or random
+        type_index = self.choose_type(player_level, rng)
+        hp, attack, defense, exp_reward = self.stats(type_index, player_level)
+
+        return Character(
+            name=self.types[type_index]["name"],
+            hp=hp,
+            max_hp=hp,
+            mp=0,
+            max_mp=0,
+            attack=attack,
+            defense=defense,
+            level=self.enemy_level(player_level, rng),
+            items=NO_ITEMS,
+            exp_reward=exp_reward
+        )
+
+
+_default_registry = None
+
+
+def get_registry():
+    """既定の敵データ（enemies.json）のレジストリを取得（初回のみ読み込む）"""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = EnemyRegistry.load()
+    return _default_registry
+
+
+def create_enemy(player_level, rng=None):
+    """プレイヤーのレベルに応じた敵を生成（rng: 乱数生成器、省略時はrandomモジュール）"""
+    return get_registry().create_enemy(player_level, rng)
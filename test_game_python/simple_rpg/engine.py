@@ -0,0 +1,222 @@
+"""ヘッドレス戦闘エンジン（描画・入力・待機を一切行わない）"""
+
+import random
+
+import metrics
+from combat import (
+    MAGIC_LIST,
+    HEAL_MAGIC_AMOUNT,
+    POTION_HEAL_AMOUNT,
+    ETHER_MP_AMOUNT,
+    calculate_damage
+)
+
+# 敵のAI: 行動候補と重み、行動ごとの技の倍率
+ENEMY_ACTIONS = ["attack", "strong_attack"]
+ENEMY_ACTION_WEIGHTS = [0.7, 0.3]
+ENEMY_ACTION_MULTIPLIERS = {"attack": 1.0, "strong_attack": 1.5}
+
+ESCAPE_RATE = 0.5  # 逃走成功率
+
+
+class WeightedRandomPolicy:
+    """
+    敵の行動を重み付きの抽選で決める（既定の敵AI）
+
+    敵AIは choose(engine) で ENEMY_ACTIONS のいずれかを返すオブジェクト。
+    """
+
+    def __init__(self, actions=ENEMY_ACTIONS, weights=ENEMY_ACTION_WEIGHTS):
+        self.actions = actions
+        self.weights = weights
+
+    def choose(self, engine):
+        """戦闘の乱数生成器で行動を抽選"""
+        return engine.rng.choices(self.actions, weights=self.weights)[0]
+
+
+DEFAULT_ENEMY_POLICY = WeightedRandomPolicy()
+
+
+class BattleEngine:
+    """
+    1回の戦闘のルール処理を担当するクラス
+
+    step() にプレイヤーの行動を渡すと、プレイヤーと敵のターンを解決して
+    発生したイベント（辞書）のリストを返す。画面表示や待機は呼び出し側が
+    イベントを見て行う。
+    """
+
+    def __init__(self, player, enemy, rng=None, enemy_policy=None):
+        """
+        Args:
+            player: プレイヤーのCharacterオブジェクト
+            enemy: 敵のCharacterオブジェクト
+            rng: 乱数生成器（random.Random互換、省略時はrandomモジュール）
+            enemy_policy: 敵AI（choose(engine) を持つオブジェクト、省略時は 70/30 の抽選）
+        """
+        self.player = player
+        self.enemy = enemy
+        self.rng = rng or random
+        self.enemy_policy = enemy_policy or DEFAULT_ENEMY_POLICY
+        self.turn = 1
+        self.result = None
+        # 戦闘履歴用の集計
+        self.damage_dealt = 0
+        self.damage_taken = 0
+        self.items_used = 0
+
+    def start(self):
+        """
+        戦闘を開始する（戦闘回数のカウントと出現イベント）
+
+        Returns:
+            list: イベントのリスト
+        """
+        self.player.total_battles += 1
+        self.player.mark_changed("total_battles")
+        return [{"type": "appear", "side": "enemy", "actor": self.enemy.name, "level": self.enemy.level, "turn": 0}]
+
+    def is_over(self):
+        """戦闘が終了しているかチェック"""
+        return self.result is not None
+
+    def legal_actions(self):
+        """
+        現在選択可能な行動の一覧を取得
+
+        Returns:
+            list: (行動, オプション) のタプルのリスト
+        """
+        actions = [("attack", None)]
+        for _, name, mp_cost, _, _ in MAGIC_LIST:
+            if self.player.mp >= mp_cost:
+                actions.append(("magic", name))
+        for name, count in self.player.items.items():
+            if count > 0:
+                actions.append(("item", name))
+        actions.append(("escape", None))
+        return actions
+
+    def step(self, action, option=None):
+        """
+        プレイヤーの行動を受け取り1ターンを解決する
+
+        Args:
+            action: "attack" / "magic" / "item" / "escape"
+            option: 魔法名またはアイテム名
+
+        Returns:
+            list: このターンに発生したイベントのリスト
+        """
+        if self.result is not None:
+            raise ValueError("戦闘は既に終了しています")
+
+        events = self._player_turn(action, option)
+
+        if self.result is None and not self.enemy.is_alive():
+            events.extend(self._victory())
+        elif self.result is None:
+            events.extend(self._enemy_turn())
+            if not self.player.is_alive():
+                self.result = "defeat"
+                events.append({"type": "defeat", "side": "player", "actor": self.player.name})
+
+        for event in events:
+            event["turn"] = self.turn
+        self.turn += 1
+
+        if self.result is not None:
+            self.player.record_battle(self)
+        return events
+
+    def _attack_event(self, attacker, defender, kind, side, skill_multiplier=1.0, name=None):
+        """ダメージ計算と適用を行い、攻撃イベントを作成"""
+        damage, is_critical = calculate_damage(attacker, defender, skill_multiplier, rng=self.rng)
+        defender.take_damage(damage)
+        if side == "player":
+            self.damage_dealt += damage
+        else:
+            self.damage_taken += damage
+        event = {
+            "type": kind,
+            "side": side,
+            "actor": attacker.name,
+            "target": defender.name,
+            "damage": damage,
+            "critical": is_critical,
+        }
+        if name is not None:
+            event["name"] = name
+        return event
+
+    def _player_turn(self, action, option):
+        """プレイヤーの行動を解決"""
+        player = self.player
+
+        if action == "attack":
+            return [self._attack_event(player, self.enemy, "attack", "player")]
+
+        if action == "magic":
+            magic = next((m for m in MAGIC_LIST if m[1] == option), None)
+            if magic is None:
+                raise ValueError(f"不明な魔法: {option}")
+            _, name, mp_cost, _, multiplier = magic
+            if not player.use_mp(mp_cost):
+                raise ValueError(f"MPが足りません: {name}")
+            if name == "ヒール":
+                player.heal(HEAL_MAGIC_AMOUNT)
+                return [{"type": "heal", "side": "player", "actor": player.name,
+                         "source": "magic", "name": name, "amount": HEAL_MAGIC_AMOUNT}]
+            return [self._attack_event(player, self.enemy, "magic", "player", multiplier, name)]
+
+        if action == "item":
+            if player.items.get(option, 0) <= 0:
+                raise ValueError(f"アイテムがありません: {option}")
+            if option == "回復薬":
+                player.heal(POTION_HEAL_AMOUNT)
+                player.use_item(option)
+                self.items_used += 1
+                return [{"type": "heal", "side": "player", "actor": player.name,
+                         "source": "item", "name": option, "amount": POTION_HEAL_AMOUNT}]
+            if option == "魔法の水":
+                player.restore_mp(ETHER_MP_AMOUNT)
+                player.use_item(option)
+                self.items_used += 1
+                return [{"type": "mp_restore", "side": "player", "actor": player.name,
+                         "source": "item", "name": option, "amount": ETHER_MP_AMOUNT}]
+            raise ValueError(f"不明なアイテム: {option}")
+
+        if action == "escape":
+            success = self.rng.random() < ESCAPE_RATE
+            if success:
+                self.result = "escaped"
+            return [{"type": "escape", "side": "player", "actor": player.name, "success": success}]
+
+        raise ValueError(f"不明な行動: {action}")
+
+    def _enemy_turn(self):
+        """敵の行動を解決"""
+        with metrics.timer("phase", "enemy_ai"):
+            enemy_action = self.enemy_policy.choose(self)
+
+        events = [{"type": "enemy_turn", "side": "enemy", "actor": self.enemy.name}]
+        events.append(self._attack_event(
+            self.enemy, self.player, enemy_action, "enemy", ENEMY_ACTION_MULTIPLIERS[enemy_action]
+        ))
+        return events
+
+    def _victory(self):
+        """勝利処理（経験値獲得とレベルアップ）"""
+        self.result = "victory"
+        self.player.total_victories += 1
+        self.player.mark_changed("total_victories")
+
+        exp_gained = self.enemy.exp_reward
+        events = [{"type": "victory", "side": "player", "actor": self.player.name,
+                   "target": self.enemy.name, "exp": exp_gained}]
+
+        for level_up_data in self.player.gain_exp(exp_gained, self.rng):
+            events.append({"type": "level_up", "side": "player", "actor": self.player.name, **level_up_data})
+
+        return events
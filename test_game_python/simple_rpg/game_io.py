@@ -0,0 +1,205 @@
+"""ゲーム全体で共有する入出力
+
+入力は ask / ask_int / confirm を通して受け取り、入力元は set_input で
+差し替えられる（端末・スクリプト・ランダム）。出力は共有コンソールに行い、
+set_output で端末・出力なし・記録のいずれかに切り替えられる。
+"""
+
+import os
+import time
+
+from rich.console import Console
+
+import metrics
+
+# 全モジュールで共有するコンソール
+# （戦闘画面のLive表示の上に演出やメニューを正しく重ねるため、1つにまとめる）
+console = Console()
+_devnull = None  # set_output("record") の書き出し先（使い回す）
+
+NO_DEFAULT = ...  # 既定値なし（rich のプロンプトと同じ表現）
+
+
+class ScriptError(ValueError):
+    """スクリプトの回答がプロンプトの選択肢に合わない"""
+
+
+class ScriptExhausted(EOFError):
+    """スクリプトの回答を使い切った"""
+
+
+class ConsoleInput:
+    """端末から入力を受け取る（rich のプロンプト）"""
+
+    def ask(self, prompt, choices=None, default=NO_DEFAULT):
+        from rich.prompt import Prompt
+        return Prompt.ask(prompt, console=console, choices=choices, default=default)
+
+    def ask_int(self, prompt, choices=None, default=NO_DEFAULT):
+        from rich.prompt import IntPrompt
+        return IntPrompt.ask(prompt, console=console, choices=choices, default=default)
+
+    def confirm(self, prompt, default=False):
+        from rich.prompt import Confirm
+        return Confirm.ask(prompt, console=console, default=default)
+
+
+class ScriptedInput:
+    """
+    用意した回答を順番に返す入力元
+
+    空文字列の回答は Enter と同じく既定値になる。回答が選択肢に無い場合は
+    ScriptError、回答を使い切ると ScriptExhausted を送出する。
+    プロンプトごとに、前の回答を返してから次に聞かれるまでの時間
+    （ゲームがその入力を処理した時間）を latencies に記録する。
+    """
+
+    def __init__(self, answers):
+        """
+        Args:
+            answers: 回答（文字列）のイテラブル
+        """
+        self._answers = iter(answers)
+        self.steps = 0
+        self.latencies = []  # (プロンプト, 秒) のリスト
+        self._last_prompt = None
+        self._last_answered = None
+
+    @classmethod
+    def from_file(cls, path):
+        """スクリプトファイルから作成（1行に1つの回答、# で始まる行は無視）"""
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = [line.rstrip("\n") for line in f]
+        return cls(line for line in lines if not line.lstrip().startswith("#"))
+
+    def _next(self, prompt, choices, default):
+        """次の回答を取得し、前の回答からの処理時間を記録"""
+        now = time.perf_counter()
+        if self._last_answered is not None:
+            self.latencies.append((self._last_prompt, now - self._last_answered))
+        answer = self._choose(prompt, choices, default)
+        self.steps += 1
+        self._last_prompt = prompt
+        self._last_answered = time.perf_counter()
+        return answer
+
+    def _choose(self, prompt, choices, default):
+        """回答を1つ決める（サブクラスで変更できる）"""
+        try:
+            return next(self._answers)
+        except StopIteration:
+            raise ScriptExhausted(f"スクリプトの回答がありません: {prompt}") from None
+
+    def ask(self, prompt, choices=None, default=NO_DEFAULT):
+        answer = self._next(prompt, choices, default)
+        if answer == "" and default is not NO_DEFAULT:
+            return default
+        if choices is not None and answer not in choices:
+            raise ScriptError(f"{prompt}: {answer!r} は選択肢 {choices} にありません")
+        return answer
+
+    def ask_int(self, prompt, choices=None, default=NO_DEFAULT):
+        answer = self._next(prompt, choices, default)
+        if answer == "" and default is not NO_DEFAULT:
+            return default
+        if choices is not None and answer not in choices:
+            raise ScriptError(f"{prompt}: {answer!r} は選択肢 {choices} にありません")
+        try:
+            return int(answer)
+        except ValueError:
+            raise ScriptError(f"{prompt}: {answer!r} は整数ではありません") from None
+
+    def confirm(self, prompt, default=False):
+        answer = self._next(prompt, ["y", "n"], default).lower()
+        if answer == "":
+            return default
+        if answer not in ("y", "yes", "n", "no"):
+            raise ScriptError(f"{prompt}: {answer!r} は y/n ではありません")
+        return answer in ("y", "yes")
+
+
+class RandomInput(ScriptedInput):
+    """選択肢からランダムに回答する入力元（長時間の連続テスト用）"""
+
+    def __init__(self, rng, steps=None, text="勇者"):
+        """
+        Args:
+            rng: 乱数生成器
+            steps: 回答する回数（省略時は無制限）
+            text: 選択肢の無いプロンプトへの回答（既定値がある場合は既定値を使う）
+        """
+        super().__init__(())
+        self.rng = rng
+        self.max_steps = steps
+        self.text = text
+
+    def _choose(self, prompt, choices, default):
+        if self.max_steps is not None and self.steps >= self.max_steps:
+            raise ScriptExhausted(f"回答数の上限に達しました: {self.max_steps}")
+        if choices:
+            return self.rng.choice(choices)
+        return "" if default is not NO_DEFAULT else self.text
+
+
+# 現在の入力元
+input_provider = ConsoleInput()
+
+
+def set_input(provider):
+    """
+    入力元を差し替える
+
+    Returns:
+        以前の入力元
+    """
+    global input_provider
+    previous, input_provider = input_provider, provider
+    return previous
+
+
+def ask(prompt, choices=None, default=NO_DEFAULT):
+    """文字列の入力を受け取る"""
+    with metrics.timer("phase", "input"):
+        return input_provider.ask(prompt, choices=choices, default=default)
+
+
+def ask_int(prompt, choices=None, default=NO_DEFAULT):
+    """整数の入力を受け取る"""
+    with metrics.timer("phase", "input"):
+        return input_provider.ask_int(prompt, choices=choices, default=default)
+
+
+def confirm(prompt, default=False):
+    """y/n の確認を受け取る"""
+    with metrics.timer("phase", "input"):
+        return input_provider.confirm(prompt, default=default)
+
+
+def set_output(mode):
+    """
+    共有コンソールの出力先を切り替える
+
+    Args:
+        mode: "terminal"（標準出力）/ "null"（出力しない）/ "record"（メモリに記録）
+    """
+    global _devnull
+    if mode == "terminal":
+        console.quiet = False
+        console.record = False
+        console.file = None
+    elif mode == "null":
+        console.quiet = True
+        console.record = False
+    elif mode == "record":
+        console.quiet = False
+        console.record = True
+        if _devnull is None:
+            _devnull = open(os.devnull, 'w', encoding='utf-8')
+        console.file = _devnull
+    else:
+        raise ValueError(f"不明な出力先: {mode}")
+
+
+def recorded_output(clear=True):
+    """記録した出力をテキストで取得（set_output("record") の場合）"""
+    return console.export_text(clear=clear)
@@ -1,16 +1,75 @@
 """Python RPG 戦闘システム - メインエントリーポイント"""
 
-from rich.console import Console
+import os
+from functools import partial
+
 from rich.panel import Panel
-from rich.prompt import Prompt, Confirm
-from character import Character
+from character import Character, START_HP, START_MP, START_ATTACK, START_DEFENSE
 from battle import start_battle
-from ui import create_character_panel, show_save_menu, show_load_menu
+from battle_log import BattleJournal
+from ui import (
+    create_character_panel,
+    show_save_menu,
+    show_load_menu,
+    show_auto_battle_menu,
+    show_auto_battle_summary,
+    show_battle_history
+)
+from autobattle import GrindPolicy, auto_battle
 from save_system import SaveSystem
-import time
+from replay import BattleRecorder
+from animation import scheduler
+from game_io import console, ask, confirm
+
+# ゲームで使うセーブの設定（書き込みはバックグラウンド、オートセーブは差分のみ）
+SAVE_OPTIONS = {"write_behind": True, "delta": True}
+
+# セーブ・戦闘ログの保存先（open_storage で作成する）
+save_system = None
+battle_journal = None
+# 戦闘ごとのシードと入力の記録（python -m replay で再生・検証できる）
+battle_records = None
+battle_recorder = None
+
+
+def open_storage(base_dir=""):
+    """
+    セーブ・戦闘ログの保存先を開く（game_loop の前に呼ぶ）
+
+    Args:
+        base_dir: saves / logs を作成するディレクトリ（省略時は作業ディレクトリ）
+    """
+    global save_system, battle_journal, battle_records, battle_recorder
+    save_system = SaveSystem(os.path.join(base_dir, "saves"), **SAVE_OPTIONS)
+    battle_journal = BattleJournal(os.path.join(base_dir, "logs", "battle_journal.jsonl"))
+    battle_records = BattleJournal(os.path.join(base_dir, "logs", "battle_records.jsonl"))
+    battle_recorder = BattleRecorder(battle_records)
+
+
+def close_storage():
+    """保存先を閉じる（書き込み待ちのセーブ・ログを書き出す）"""
+    battle_journal.close()
+    battle_records.close()
+    save_system.close()
+
+
+def game_over(player):
+    """ゲームオーバーの表示とセーブの確認"""
+    console.print("\n[bold red]GAME OVER[/bold red]")
+    
+    # ゲームオーバー時にセーブするか確認
+    if confirm("セーブしますか?"):
+        console.clear()
+        slot = show_save_menu(save_system)
+        if slot > 0:
+            if save_system.save_game(player, slot):
+                console.print(f"[green]スロット {slot} にセーブしました[/green]")
+            else:
+                console.print("[red]セーブに失敗しました[/red]")
+            scheduler.wait(1)
+    
+    scheduler.wait(2)
 
-console = Console()
-save_system = SaveSystem()
 
 def game_loop():
     """ゲームメインループ"""
@@ -26,7 +85,7 @@ def game_loop():
         border_style="bold cyan"
     ))
     
-    choice = Prompt.ask(
+    choice = ask(
         "選択してください",
         choices=["1", "2", "3"],
         default="1"
@@ -36,12 +95,13 @@ def game_loop():
         return
     
     player = None
+    current_slot = None  # オートセーブ先（最後にロード・セーブしたスロット）
     
     if choice == "1":
         # 新規ゲーム
         console.clear()
-        player_name = Prompt.ask("[bold cyan]あなたの名前を入力してください[/bold cyan]", default="勇者")
-        player = Character(player_name, 100, 100, 50, 50, 25, 10, level=1)
+        player_name = ask("[bold cyan]あなたの名前を入力してください[/bold cyan]", default="勇者")
+        player = Character(player_name, START_HP, START_HP, START_MP, START_MP, START_ATTACK, START_DEFENSE, level=1)
         
         console.print(Panel(
             f"[bold green]ようこそ、{player_name}![/bold green]\n\n"
@@ -49,7 +109,7 @@ def game_loop():
             title="🎮 冒険の始まり",
             border_style="bold green"
         ))
-        time.sleep(2)
+        scheduler.wait(2)
     
     elif choice == "2":
         # ロード
@@ -58,27 +118,29 @@ def game_loop():
         
         if slot == 0:
             console.print("[yellow]ロードをキャンセルしました[/yellow]")
-            time.sleep(1)
+            scheduler.wait(1)
             return
         
         save_data = save_system.load_game(slot)
         
         if save_data:
             player = Character.from_save_data(save_data)
+            current_slot = slot
             console.print(Panel(
                 f"[bold green]おかえりなさい、{player.name}![/bold green]\n\n"
                 f"[white]レベル {player.level} から冒険を再開します[/white]",
                 title="📂 ロード完了",
                 border_style="bold green"
             ))
-            time.sleep(2)
+            scheduler.wait(2)
         else:
             console.print("[red]セーブデータの読み込みに失敗しました[/red]")
-            time.sleep(2)
+            scheduler.wait(2)
             return
     
     # ゲームループ
     while True:
+        scheduler.reset_skip()
         console.clear()
         
         # ステータス表示
@@ -99,39 +161,32 @@ def game_loop():
         console.print("3: セーブ")
         console.print("4: ステータス確認")
         console.print("5: ゲーム終了")
+        console.print("6: 自動戦闘")
         
-        choice = Prompt.ask(
+        choice = ask(
             "行動を選択してください",
-            choices=["1", "2", "3", "4", "5"],
+            choices=["1", "2", "3", "4", "5", "6"],
             default="1"
         )
         
         if choice == "1":
             # 戦闘
-            result = start_battle(player)
+            # ロード・セーブしたスロットがあれば戦闘後にバックグラウンドでオートセーブ
+            autosave = None
+            if current_slot is not None:
+                autosave = partial(save_system.save_game, slot=current_slot, background=True)
+            
+            result = start_battle(player, journal=battle_journal, autosave=autosave, recorder=battle_recorder)
             
             if result == "defeat":
-                console.print("\n[bold red]GAME OVER[/bold red]")
-                
-                # ゲームオーバー時にセーブするか確認
-                if Confirm.ask("セーブしますか?"):
-                    console.clear()
-                    slot = show_save_menu(save_system)
-                    if slot > 0:
-                        if save_system.save_game(player, slot):
-                            console.print(f"[green]スロット {slot} にセーブしました[/green]")
-                        else:
-                            console.print("[red]セーブに失敗しました[/red]")
-                        time.sleep(1)
-                
-                time.sleep(2)
+                game_over(player)
                 break
             
             # 戦闘後、続けるか確認
             console.print()
-            if not Prompt.ask("続けますか?", choices=["y", "n"], default="y") == "y":
+            if not ask("続けますか?", choices=["y", "n"], default="y") == "y":
                 # 終了前にセーブするか確認
-                if Confirm.ask("セーブしますか?"):
+                if confirm("セーブしますか?"):
                     console.clear()
                     slot = show_save_menu(save_system)
                     if slot > 0:
@@ -139,15 +194,14 @@ def game_loop():
                             console.print(f"[green]スロット {slot} にセーブしました[/green]")
                         else:
                             console.print("[red]セーブに失敗しました[/red]")
-                        time.sleep(1)
+                        scheduler.wait(1)
                 break
         
         elif choice == "2":
             # 休憩
-            player.hp = player.max_hp
-            player.mp = player.max_mp
+            player.rest()
             console.print("\n[green]休憩して完全に回復した![/green]")
-            time.sleep(1)
+            scheduler.wait(1)
         
         elif choice == "3":
             # セーブ
@@ -158,17 +212,18 @@ def game_loop():
                 # 上書き確認
                 existing_save = save_system.get_save_info(slot)
                 if existing_save:
-                    if not Confirm.ask(f"[yellow]スロット {slot} を上書きしますか?[/yellow]"):
+                    if not confirm(f"[yellow]スロット {slot} を上書きしますか?[/yellow]"):
                         console.print("[dim]セーブをキャンセルしました[/dim]")
-                        time.sleep(1)
+                        scheduler.wait(1)
                         continue
                 
                 if save_system.save_game(player, slot):
                     console.print(f"[green]スロット {slot} にセーブしました![/green]")
+                    current_slot = slot
                 else:
                     console.print("[red]セーブに失敗しました[/red]")
                 
-                time.sleep(1)
+                scheduler.wait(1)
         
         elif choice == "4":
             # ステータス確認
@@ -178,11 +233,33 @@ def game_loop():
                 title="📊 詳細ステータス",
                 border_style="cyan"
             ))
-            Prompt.ask("\n[dim]Enterキーで戻る[/dim]", default="")
+            show_battle_history(player)
+            ask("\n[dim]Enterキーで戻る[/dim]", default="")
+        
+        elif choice == "6":
+            # 自動戦闘（描画なしでまとめて戦い、結果だけを表示）
+            console.clear()
+            settings = show_auto_battle_menu()
+            if settings is None:
+                continue
+            count, heal_below, use_items = settings
+            policy = GrindPolicy(heal_below, use_potions=use_items, use_ethers=use_items)
+            summary = auto_battle(player, count, policy, recorder=battle_recorder)
+            
+            console.clear()
+            show_auto_battle_summary(summary, player)
+            
+            if summary["outcomes"]["defeat"]:
+                game_over(player)
+                break
+            
+            if current_slot is not None:
+                save_system.save_game(player, current_slot, background=True)
+            ask("\n[dim]Enterキーで戻る[/dim]", default="")
         
         elif choice == "5":
             # ゲーム終了
-            if Confirm.ask("セーブして終了しますか?"):
+            if confirm("セーブして終了しますか?"):
                 console.clear()
                 slot = show_save_menu(save_system)
                 if slot > 0:
@@ -190,7 +267,7 @@ def game_loop():
                         console.print(f"[green]スロット {slot} にセーブしました[/green]")
                     else:
                         console.print("[red]セーブに失敗しました[/red]")
-                    time.sleep(1)
+                    scheduler.wait(1)
             break
     
     # ゲーム終了時の統計表示
@@ -207,6 +284,27 @@ def game_loop():
 
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Python RPG")
+    parser.add_argument("--turbo", type=float, default=None, help="演出の早送り倍率")
+    parser.add_argument("--no-wait", action="store_true", help="演出の待ち時間をなくす")
+    parser.add_argument("--save-db", default=None, help="セーブをSQLiteデータベースに保存する（ファイルのパス）")
+    parser.add_argument("--player-id", default="default", help="データベースに保存するときのプレイヤーID")
+    parser.add_argument("--metrics", default=None, help="処理時間を計測して終了時に書き出すファイル（.json / .prom）")
+    args = parser.parse_args()
+    scheduler.configure(turbo=args.turbo, headless=args.no_wait or None)
+
+    if args.metrics:
+        import metrics
+        metrics.enable(args.metrics)
+
+    open_storage()
+    if args.save_db:
+        from sqlite_store import SqliteSaveStore
+        save_system.close()
+        save_system = SqliteSaveStore(args.save_db, player_id=args.player_id)
+
     console.print(Panel(
         "[bold cyan]Python RPG - Save/Load System[/bold cyan]\n\n"
         "[white]セーブ/ロード機能が追加されました!\n"
@@ -214,8 +312,9 @@ if __name__ == "__main__":
         title="🎮 ゲームスタート",
         border_style="bold cyan"
     ))
-    time.sleep(2)
+    scheduler.wait(2)
     
     game_loop()
+    close_storage()
     
     console.print("\n[dim]ゲームを終了します...[/dim]")
\ No newline at end of file
@@ -0,0 +1,329 @@
+"""マルコフ連鎖による戦闘の勝率・期待ターン数の厳密計算
+
+戦闘を (プレイヤーHP, プレイヤーMP, 敵HP, 回復薬, 魔法の水) を状態とする
+マルコフ連鎖とみなし、calculate_damage の通常/クリティカルの確率と
+敵の 70/30 の行動選択から遷移確率を求めて、状態ごとに勝率と残りターン数の
+期待値をメモ化しながら計算する。
+
+使い方（simple_rpg ディレクトリで実行）:
+    python -m markov --max-level 10 --policy grind
+"""
+
+import argparse
+from typing import NamedTuple
+
+from character import average_player_stats
+from combat import (
+    MAGIC_LIST,
+    HEAL_MAGIC_AMOUNT,
+    POTION_HEAL_AMOUNT,
+    ETHER_MP_AMOUNT,
+    CRITICAL_RATE,
+    damage_table
+)
+from enemy_registry import get_registry
+from engine import ENEMY_ACTIONS, ENEMY_ACTION_WEIGHTS, ENEMY_ACTION_MULTIPLIERS, ESCAPE_RATE
+
+# 終了状態
+WIN, LOSE, ESCAPE = "win", "lose", "escape"
+
+
+class BattleState(NamedTuple):
+    """戦闘中の状態（プレイヤーの行動を選ぶ直前）"""
+
+    player_hp: int
+    player_mp: int
+    enemy_hp: int
+    potions: int = 0
+    ethers: int = 0
+
+
+def attack_policy(state, model):
+    """毎ターン通常攻撃する"""
+    return "attack", None
+
+
+def grind_policy(state, model):
+    """
+    simulate.grind_action と同じ行動選択
+    （HPが3割未満なら回復薬、無ければヒール、それ以外は攻撃）
+    """
+    if state.player_hp < model.player_max_hp * 0.3:
+        if state.potions > 0:
+            return "item", "回復薬"
+        if state.player_mp >= model.magic["ヒール"][0]:
+            return "magic", "ヒール"
+    return "attack", None
+
+
+POLICIES = {
+    "attack": attack_policy,
+    "grind": grind_policy,
+}
+
+
+def _stat(source, key, default=None):
+    """辞書またはCharacterからステータスを取得"""
+    if isinstance(source, dict):
+        return source.get(key, default) if default is not None else source[key]
+    return getattr(source, key, default) if default is not None else getattr(source, key)
+
+
+def _damage_distribution(attack, defense, skill_multiplier=1.0):
+    """calculate_damage のダメージの分布 [(ダメージ, 確率)]"""
+    normal, critical = damage_table(attack, defense, skill_multiplier)
+    if normal == critical:
+        return [(normal, 1.0)]
+    return [(normal, 1.0 - CRITICAL_RATE), (critical, CRITICAL_RATE)]
+
+
+class BattleModel:
+    """
+    1組のプレイヤーと敵の戦闘をマルコフ連鎖として解くクラス
+
+    状態ごとの結果は self.memo に保存されるので、同じモデルで別の
+    開始状態を解く場合も計算済みの状態は再利用される。
+    """
+
+    def __init__(self, player, enemy, policy=attack_policy):
+        """
+        Args:
+            player: プレイヤーのステータス（hp, attack, defense と、任意で mp, max_hp, max_mp を持つ辞書かCharacter）
+            enemy: 敵のステータス（hp, attack, defense を持つ辞書かCharacter）
+            policy: (BattleState, BattleModel) を受け取り (行動, オプション) を返す関数
+        """
+        self.player_max_hp = _stat(player, "max_hp", _stat(player, "hp"))
+        self.player_max_mp = _stat(player, "max_mp", _stat(player, "mp", 0))
+        self.policy = policy
+
+        player_attack, player_defense = _stat(player, "attack"), _stat(player, "defense")
+        enemy_attack, enemy_defense = _stat(enemy, "attack"), _stat(enemy, "defense")
+
+        self.attack_damage = _damage_distribution(player_attack, enemy_defense)
+        # 魔法名 -> (消費MP, ダメージの分布、回復魔法はNone)
+        self.magic = {
+            name: (mp_cost, _damage_distribution(player_attack, enemy_defense, multiplier) if multiplier else None)
+            for _, name, mp_cost, _, multiplier in MAGIC_LIST
+        }
+
+        # 敵の行動ごとのダメージの分布
+        self.enemy_action_damage = {
+            action: _damage_distribution(enemy_attack, player_defense, multiplier)
+            for action, multiplier in ENEMY_ACTION_MULTIPLIERS.items()
+        }
+
+        # 敵の1ターンで受けるダメージの分布（行動選択とクリティカルをまとめる）
+        enemy_damage = {}
+        for action, weight in zip(ENEMY_ACTIONS, ENEMY_ACTION_WEIGHTS):
+            for damage, p in self.enemy_action_damage[action]:
+                enemy_damage[damage] = enemy_damage.get(damage, 0.0) + weight * p
+        self.enemy_damage = sorted(enemy_damage.items())
+
+        self.memo = {}  # BattleState -> (勝率, 敗北率, 逃走率, 残りターン数の期待値)
+
+    def start_state(self, player, enemy):
+        """プレイヤーと敵の現在の状態から開始状態を作成"""
+        items = _stat(player, "items", {}) or {}
+        return BattleState(
+            _stat(player, "hp"),
+            _stat(player, "mp", 0),
+            _stat(enemy, "hp"),
+            items.get("回復薬", 0),
+            items.get("魔法の水", 0)
+        )
+
+    def player_outcomes(self, state):
+        """
+        プレイヤーの行動の結果の分布
+
+        Returns:
+            list: (確率, 行動後の状態 または ESCAPE)
+        """
+        action, option = self.policy(state, self)
+        hp, mp, enemy_hp, potions, ethers = state
+
+        if action == "attack":
+            return [(p, state._replace(enemy_hp=enemy_hp - damage)) for damage, p in self.attack_damage]
+
+        if action == "magic":
+            mp_cost, damage = self.magic[option]
+            if mp < mp_cost:
+                raise ValueError(f"MPが足りません: {option}")
+            if damage is None:
+                return [(1.0, state._replace(player_hp=min(self.player_max_hp, hp + HEAL_MAGIC_AMOUNT),
+                                             player_mp=mp - mp_cost))]
+            return [(p, state._replace(player_mp=mp - mp_cost, enemy_hp=enemy_hp - d)) for d, p in damage]
+
+        if action == "item":
+            if option == "回復薬" and potions > 0:
+                return [(1.0, state._replace(player_hp=min(self.player_max_hp, hp + POTION_HEAL_AMOUNT),
+                                             potions=potions - 1))]
+            if option == "魔法の水" and ethers > 0:
+                return [(1.0, state._replace(player_mp=min(self.player_max_mp, mp + ETHER_MP_AMOUNT),
+                                             ethers=ethers - 1))]
+            raise ValueError(f"アイテムがありません: {option}")
+
+        if action == "escape":
+            return [(ESCAPE_RATE, ESCAPE), (1.0 - ESCAPE_RATE, state)]
+
+        raise ValueError(f"不明な行動: {action}")
+
+    def transitions(self, state):
+        """
+        1ターン（プレイヤーの行動と敵の行動）の遷移の分布
+
+        Returns:
+            list: (確率, 次の状態 または WIN / LOSE / ESCAPE)
+        """
+        result = []
+        for p, after in self.player_outcomes(state):
+            if after == ESCAPE:
+                result.append((p, ESCAPE))
+            elif after.enemy_hp <= 0:
+                result.append((p, WIN))
+            else:
+                for damage, q in self.enemy_damage:
+                    hp = after.player_hp - damage
+                    result.append((p * q, LOSE if hp <= 0 else after._replace(player_hp=hp)))
+        return result
+
+    def solve(self, state):
+        """
+        状態から戦闘終了までの結果の確率と期待ターン数を計算
+
+        遷移先の状態を先に解く必要があるため、再帰の代わりに明示的な
+        スタックで深さ優先にたどる（ターン数が多い戦闘でも再帰の上限に達しない）。
+
+        Returns:
+            tuple: (勝率, 敗北率, 逃走率, 期待ターン数)
+        """
+        memo = self.memo
+        terminal = {WIN: (1.0, 0.0, 0.0, 0.0), LOSE: (0.0, 1.0, 0.0, 0.0), ESCAPE: (0.0, 0.0, 1.0, 0.0)}
+        in_progress = {}  # 状態 -> 遷移のリスト（遷移先が解けるのを待っている）
+        stack = [state]
+
+        while stack:
+            current = stack[-1]
+            if current in memo:
+                stack.pop()
+                continue
+
+            edges = in_progress.get(current)
+            if edges is None:
+                edges = in_progress[current] = self.transitions(current)
+
+            pending = [nxt for _, nxt in edges if nxt not in terminal and nxt not in memo]
+            if pending:
+                for nxt in pending:
+                    if nxt in in_progress:
+                        raise ValueError(f"戦闘が終わらない可能性がある行動選択です: {nxt}")
+                stack.extend(pending)
+                continue
+
+            win = lose = escape = turns = 0.0
+            for p, nxt in edges:
+                w, l, e, t = terminal[nxt] if nxt in terminal else memo[nxt]
+                win += p * w
+                lose += p * l
+                escape += p * e
+                turns += p * t
+            memo[current] = (win, lose, escape, 1.0 + turns)
+            del in_progress[current]
+            stack.pop()
+
+        return memo[state]
+
+
+def win_probability(player, enemy, policy=attack_policy):
+    """
+    プレイヤーと敵の戦闘の勝率と期待ターン数を厳密に計算
+
+    Args:
+        player: プレイヤーのステータス（辞書かCharacter、現在のHP・MP・所持品から開始する）
+        enemy: 敵のステータス（辞書かCharacter）
+        policy: プレイヤーの行動選択（attack_policy / grind_policy など）
+
+    Returns:
+        dict: win_rate, loss_rate, escape_rate, expected_turns, states（計算した状態数）
+    """
+    model = BattleModel(player, enemy, policy)
+    win, lose, escape, turns = model.solve(model.start_state(player, enemy))
+    return {
+        "win_rate": win,
+        "loss_rate": lose,
+        "escape_rate": escape,
+        "expected_turns": turns,
+        "states": len(model.memo),
+    }
+
+
+def odds_table(levels, policy=attack_policy, player_stats=average_player_stats, items=None):
+    """
+    create_enemy の全ての敵の種類とレベルの組み合わせの勝率を計算
+
+    Args:
+        levels: プレイヤーレベルのイテラブル
+        policy: プレイヤーの行動選択
+        player_stats: レベルを受け取りプレイヤーのステータスを返す関数
+        items: プレイヤーの所持品（省略時は持っていない）
+
+    Returns:
+        list: (レベル, 敵の名前, 結果の辞書) のリスト
+    """
+    registry = get_registry()
+    results = []
+    for level in levels:
+        player = dict(player_stats(level), items=items or {})
+        for type_index in range(len(registry.types)):
+            enemy = registry.stats_dict(type_index, level)
+            results.append((level, enemy["name"], win_probability(player, enemy, policy)))
+    return results
+
+
+def main():
+    """計算結果を表で表示"""
+    import time
+
+    from rich.console import Console
+    from rich.table import Table
+
+    parser = argparse.ArgumentParser(description="敵の種類×レベルごとの勝率をマルコフ連鎖で厳密に計算")
+    parser.add_argument("--max-level", type=int, default=10, help="最大プレイヤーレベル")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="attack", help="プレイヤーの行動選択")
+    parser.add_argument("--potions", type=int, default=0, help="所持している回復薬の数")
+    parser.add_argument("--ethers", type=int, default=0, help="所持している魔法の水の数")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = odds_table(
+        range(1, args.max_level + 1),
+        POLICIES[args.policy],
+        items={"回復薬": args.potions, "魔法の水": args.ethers}
+    )
+    seconds = time.perf_counter() - start
+
+    table = Table(title=f"🎯 勝率の厳密計算（行動: {args.policy}）", show_header=True)
+    table.add_column("Lv", style="cyan", justify="right")
+    table.add_column("敵", style="red", no_wrap=True)
+    table.add_column("勝率", style="green", justify="right", no_wrap=True)
+    table.add_column("敗北率", style="magenta", justify="right", no_wrap=True)
+    table.add_column("期待ターン", style="yellow", justify="right")
+    table.add_column("状態数", style="white", justify="right")
+
+    for level, name, odds in results:
+        table.add_row(
+            str(level),
+            name,
+            f"{odds['win_rate'] * 100:.4f}%",
+            f"{odds['loss_rate'] * 100:.4f}%",
+            f"{odds['expected_turns']:.3f}",
+            str(odds["states"])
+        )
+
+    console = Console()
+    console.print(table)
+    console.print(f"[dim]計算時間: {seconds:.2f}秒[/dim]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""オプトインの計測（フェーズ・セーブ操作ごとの処理時間のヒストグラムと呼び出し回数）
+
+無効の間は timer() が何もしない共有のコンテキストマネージャーを返し、
+呼び出し回数は呼び出し側で `if metrics.enabled:` を確認してから数えるので、
+計測しない場合のオーバーヘッドはほぼない。
+
+タイマーは入れ子にでき、ヒストグラムには内側のタイマーの時間を除いた
+時間（自身の時間）を記録する。例えば戦闘のターンでは、ダメージ計算の
+時間に敵AIの時間は含まれず、描画の時間に演出の待ち時間は含まれない。
+
+有効にする方法:
+    RPG_METRICS=metrics.json python main.py      # 終了時にJSONで書き出す
+    python main.py --metrics metrics.prom        # Prometheus のテキスト形式
+"""
+
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+enabled = False
+
+# ヒストグラムのバケットの上限（秒）
+BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+PROMETHEUS_PREFIX = "rpg"
+
+_lock = threading.Lock()
+_local = threading.local()  # スレッドごとの入れ子のタイマー
+_histograms = {}  # (種類, 名前) -> Histogram
+_counters = Counter()  # 関数名 -> 呼び出し回数
+_export_path = None
+
+
+class Histogram:
+    """処理時間のヒストグラム（BUCKETS ごとの件数・合計・最小・最大）"""
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # 最後は BUCKETS の上限を超えたもの
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, seconds):
+        """処理時間を1件記録"""
+        index = 0
+        while index < len(BUCKETS) and seconds > BUCKETS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def quantile(self, q):
+        """バケットから分位点を見積もる（該当するバケットの上限を返す）"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for bound, bucket_count in zip(BUCKETS, self.counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        """JSON用の辞書"""
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": dict(zip([str(bound) for bound in BUCKETS] + ["+Inf"], self.counts)),
+        }
+
+
+class _Timer:
+    """処理時間を計測して、内側のタイマーの時間を除いて記録する"""
+
+    __slots__ = ("kind", "name", "start", "children")
+
+    def __init__(self, kind, name):
+        self.kind = kind
+        self.name = name
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self)
+        self.children = 0.0
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        elapsed = time.perf_counter() - self.start
+        stack = _local.stack
+        stack.pop()
+        if stack:
+            stack[-1].children += elapsed
+        observe(self.kind, self.name, elapsed - self.children)
+
+
+class _NullTimer:
+    """計測が無効な場合のタイマー（何もしない）"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(kind, name):
+    """
+    with 文で処理時間を計測する
+
+    Args:
+        kind: 計測の種類（"phase": 戦闘のフェーズ, "save": セーブ操作）
+        name: フェーズ名・操作名
+
+    Returns:
+        コンテキストマネージャー（無効の場合は何もしない）
+    """
+    if not enabled:
+        return _NULL_TIMER
+    return _Timer(kind, name)
+
+
+def timed(kind, name=None):
+    """
+    関数の処理時間を計測するデコレーター
+
+    Args:
+        kind: 計測の種類
+        name: 操作名（省略時は関数名）
+    """
+    def decorator(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            with _Timer(kind, label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def observe(kind, name, seconds):
+    """処理時間を1件記録"""
+    with _lock:
+        histogram = _histograms.get((kind, name))
+        if histogram is None:
+            histogram = _histograms[(kind, name)] = Histogram()
+        histogram.observe(seconds)
+
+
+def count(name):
+    """呼び出し回数を数える（呼び出し側で enabled を確認してから呼ぶ）"""
+    _counters[name] += 1
+
+
+def enable(export_path=None):
+    """
+    計測を有効にする
+
+    Args:
+        export_path: 終了時に結果を書き出すファイル（.prom / .txt なら Prometheus のテキスト形式、
+            それ以外はJSON、省略時は書き出さない）
+    """
+    global enabled, _export_path
+    enabled = True
+    if export_path and _export_path is None:
+        atexit.register(_export_at_exit)
+    if export_path:
+        _export_path = os.path.abspath(export_path)  # 作業ディレクトリが変わっても同じ場所に書き出す
+
+
+def disable():
+    """計測を無効にする（記録した結果は残る）"""
+    global enabled
+    enabled = False
+
+
+def reset():
+    """記録した結果を破棄"""
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def snapshot():
+    """
+    記録した結果を取得
+
+    Returns:
+        dict: timings（種類 -> 名前 -> ヒストグラムの辞書）, calls（関数名 -> 呼び出し回数）
+    """
+    with _lock:
+        timings = {}
+        for (kind, name), histogram in sorted(_histograms.items()):
+            timings.setdefault(kind, {})[name] = histogram.to_dict()
+        return {"timings": timings, "calls": dict(sorted(_counters.items()))}
+
+
+def to_prometheus():
+    """記録した結果を Prometheus のテキスト形式で取得"""
+    lines = []
+    with _lock:
+        for kind in sorted({kind for kind, _ in _histograms}):
+            metric = f"{PROMETHEUS_PREFIX}_{kind}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for (hist_kind, name), histogram in sorted(_histograms.items()):
+                if hist_kind != kind:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(BUCKETS, histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f'{metric}_bucket{{name="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{name="{name}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{metric}_sum{{name="{name}"}} {histogram.total}')
+                lines.append(f'{metric}_count{{name="{name}"}} {histogram.count}')
+
+        if _counters:
+            metric = f"{PROMETHEUS_PREFIX}_calls_total"
+            lines.append(f"# TYPE {metric} counter")
+            for name, value in sorted(_counters.items()):
+                lines.append(f'{metric}{{function="{name}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def write(path):
+    """記録した結果をファイルに書き出す（拡張子で形式を選ぶ）"""
+    if os.path.splitext(path)[1] in (".prom", ".txt"):
+        text = to_prometheus()
+    else:
+        text = json.dumps(snapshot(), ensure_ascii=False, indent=2)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def _export_at_exit():
+    """終了時に結果を書き出す"""
+    if _export_path:
+        write(_export_path)
+
+
+# RPG_METRICS=ファイル名: 起動時から計測して終了時に書き出す
+if os.environ.get("RPG_METRICS"):
+    enable(os.environ["RPG_METRICS"])
@@ -0,0 +1,217 @@
+"""戦闘の記録（シードとプレイヤーの入力）と、記録した戦闘の高速な再生・検証
+
+使い方（simple_rpg ディレクトリで実行）:
+    python -m replay logs/battle_records.jsonl
+"""
+
+import argparse
+import json
+import random
+import time
+from typing import NamedTuple
+
+from character import Character
+from combat import MAGIC_LIST, ITEM_LIST
+from engine import BattleEngine, DEFAULT_ENEMY_POLICY
+from enemy_registry import get_registry
+from save_system import build_save_data
+
+# 行動 -> 1文字のコード（魔法はメニューの番号、アイテムは A, B, ...）
+ACTION_CODES = {("attack", None): "a", ("escape", None): "e"}
+for _key, _name, _, _, _ in MAGIC_LIST:
+    ACTION_CODES[("magic", _name)] = _key
+for _i, (_, _name, _) in enumerate(ITEM_LIST):
+    ACTION_CODES[("item", _name)] = chr(ord("A") + _i)
+ACTIONS_BY_CODE = {code: action for action, code in ACTION_CODES.items()}
+
+
+class BattleRecord(NamedTuple):
+    """1回の戦闘の記録"""
+
+    seed: int
+    player: dict  # 戦闘開始前のプレイヤー（セーブデータと同じ形式）
+    actions: str  # プレイヤーの行動のコードを順番に並べた文字列
+    final: dict  # 戦闘終了時の状態（final_state の戻り値、playerは戦闘開始前から変化した項目のみ）
+
+
+def player_state(player):
+    """プレイヤーの状態をセーブデータと同じ形式の辞書で取得（戦闘履歴は除く）"""
+    return build_save_data(player, include_history=False)["player"]
+
+
+def final_state(engine, initial_player):
+    """
+    戦闘終了時の状態（再生結果の検証用）
+
+    Args:
+        engine: 終了したBattleEngine
+        initial_player: 戦闘開始前のプレイヤーの状態（変化した項目だけを記録するため）
+    """
+    player = player_state(engine.player)
+    return {
+        "result": engine.result,
+        "turns": engine.turn - 1,
+        "enemy": engine.enemy.name,
+        "enemy_hp": engine.enemy.hp,
+        "player": {key: value for key, value in player.items() if initial_player.get(key) != value},
+    }
+
+
+class BattleRecorder:
+    """
+    start_battle に渡して、戦闘ごとのシードとプレイヤーの入力を記録するクラス
+
+    戦闘ごとに新しいシードで乱数生成器を作るので、同じ入力を与えれば
+    敵の出現からダメージ・レベルアップまで完全に同じ戦闘になる。
+    （再生は既定の敵AIで行うため、enemy_policy を指定した戦闘は記録できない）
+    """
+
+    def __init__(self, journal=None, seed_rng=None):
+        """
+        Args:
+            journal: 記録を書き出すBattleJournal（省略時はメモリ上にのみ保持）
+            seed_rng: シードを決める乱数生成器（省略時はrandomモジュール）
+        """
+        self.journal = journal
+        self.seed_rng = seed_rng or random
+        self.records = []
+        self._seed = None
+        self._player = None
+        self._actions = []
+
+    def check_enemy_policy(self, enemy_policy):
+        """
+        記録する戦闘の敵AIが再生できるものかチェック
+
+        記録には敵AIを保存せず、再生は既定の敵AIで行う。ExpectimaxPolicy のように
+        探索の深さが処理時間で変わる敵AIは、同じシードでも同じ行動になるとは限らない。
+
+        Raises:
+            ValueError: 既定以外の敵AIが指定された場合
+        """
+        if enemy_policy is not None and enemy_policy is not DEFAULT_ENEMY_POLICY:
+            raise ValueError(f"既定以外の敵AIの戦闘は記録・再生できません: {type(enemy_policy).__name__}")
+
+    def begin(self, player):
+        """
+        戦闘の記録を開始する
+
+        Args:
+            player: 戦闘開始前のプレイヤー
+
+        Returns:
+            random.Random: この戦闘で使う乱数生成器
+        """
+        self._seed = self.seed_rng.getrandbits(63)
+        self._player = player_state(player)
+        self._actions = []
+        return random.Random(self._seed)
+
+    def record(self, action, option=None):
+        """プレイヤーの行動を1つ記録"""
+        self._actions.append(ACTION_CODES[(action, option)])
+
+    def end(self, engine):
+        """
+        戦闘の記録を終了する
+
+        Returns:
+            BattleRecord: 記録した戦闘
+        """
+        record = BattleRecord(self._seed, self._player, "".join(self._actions), final_state(engine, self._player))
+        self.records.append(record)
+        if self.journal is not None:
+            self.journal.append(record._asdict())
+            self.journal.flush()
+        return record
+
+
+def replay_battle(record, registry=None):
+    """
+    記録した戦闘を描画・待機なしで再生する
+
+    Args:
+        record: BattleRecord
+        registry: 敵データのEnemyRegistry（省略時は既定のデータ）
+
+    Returns:
+        dict: 再生後の戦闘終了時の状態
+    """
+    player_data = dict(record.player, items=dict(record.player["items"]))
+    player = Character.from_save_data(player_data)
+    rng = random.Random(record.seed)
+    enemy = (registry or get_registry()).create_enemy(player.level, rng)
+
+    engine = BattleEngine(player, enemy, rng)
+    engine.start()
+    for code in record.actions:
+        if engine.is_over():
+            break
+        engine.step(*ACTIONS_BY_CODE[code])
+    return final_state(engine, record.player)
+
+
+def verify_battle(record, registry=None):
+    """
+    記録した戦闘を再生し、記録時と同じ結果になるか確認する
+
+    Returns:
+        list: 一致しなかった項目の名前（一致した場合は空）
+    """
+    try:
+        replayed = replay_battle(record, registry)
+    except (ValueError, KeyError) as e:
+        return [f"error: {e}"]
+
+    expected = record.final
+    mismatches = [key for key in ("result", "turns", "enemy", "enemy_hp") if replayed[key] != expected[key]]
+    changed = expected["player"].keys() | replayed["player"].keys()
+    mismatches += sorted(
+        f"player.{key}" for key in changed
+        if replayed["player"].get(key) != expected["player"].get(key)
+    )
+    return mismatches
+
+
+def load_records(path):
+    """記録ファイル（JSON Lines）から戦闘の記録を読み込む"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield BattleRecord(**json.loads(line))
+
+
+def verify_records(records, registry=None):
+    """
+    複数の戦闘の記録をまとめて検証する
+
+    Returns:
+        dict: total（件数）, failures（(番号, 一致しなかった項目) のリスト）, seconds（所要時間）
+    """
+    start = time.perf_counter()
+    total = 0
+    failures = []
+    for index, record in enumerate(records):
+        total += 1
+        mismatches = verify_battle(record, registry)
+        if mismatches:
+            failures.append((index, mismatches))
+    return {"total": total, "failures": failures, "seconds": time.perf_counter() - start}
+
+
+def main():
+    """コマンドラインから実行"""
+    parser = argparse.ArgumentParser(description="記録した戦闘を再生して結果を検証")
+    parser.add_argument("path", help="戦闘の記録ファイル（JSON Lines）")
+    parser.add_argument("--show", type=int, default=10, help="表示する不一致の最大件数")
+    args = parser.parse_args()
+
+    report = verify_records(load_records(args.path))
+    for index, mismatches in report["failures"][:args.show]:
+        print(f"#{index}: {', '.join(mismatches)}")
+    print(f"再生: {report['total']}件 | 不一致: {len(report['failures'])}件 | {report['seconds']:.2f}秒")
+    raise SystemExit(1 if report["failures"] else 0)
+
+
+if __name__ == "__main__":
+    main()
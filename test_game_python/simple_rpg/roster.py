@@ -0,0 +1,184 @@
+"""配列ベースの戦闘参加者リスト（大量の敵をまとめて扱うため）
+
+単体で使う部品で、今のところゲームやシミュレーターからは使っていない。
+1戦闘に1体ずつ敵を取り出す simulate のプレイスルーでは、まとめて生成しても
+Characterへの取り出しの分だけ create_enemy より遅くなる（400プレイスルーで約2割）ため、
+全員へのダメージ・回復や倒れた参加者の除去のような一括処理で使う。
+"""
+
+import random
+from array import array
+
+from character import Character, NO_ITEMS
+from enemy_registry import get_registry
+
+# 列の型コード（符号付き32bit整数）
+COLUMN_TYPE = "i"
+
+
+class CombatantArray:
+    """
+    戦闘参加者のステータスを列ごとの配列で保持するクラス
+
+    1体ごとにCharacterオブジェクトを作らず、hp / max_hp / attack / defense /
+    level / exp_reward をそれぞれ型付き配列に格納する。名前は種類ごとに
+    1つだけ保持し、各参加者は名前の番号を持つ。
+    """
+
+    __slots__ = ("names", "_name_ids", "name_id", "hp", "max_hp", "attack", "defense", "level", "exp_reward")
+
+    def __init__(self):
+        self.names = []
+        self._name_ids = {}
+        self.name_id = array("H")
+        self.hp = array(COLUMN_TYPE)
+        self.max_hp = array(COLUMN_TYPE)
+        self.attack = array(COLUMN_TYPE)
+        self.defense = array(COLUMN_TYPE)
+        self.level = array(COLUMN_TYPE)
+        self.exp_reward = array(COLUMN_TYPE)
+
+    def __len__(self):
+        return len(self.hp)
+
+    def _intern_name(self, name):
+        """名前を登録して番号を返す"""
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def append(self, name, hp, attack, defense, level=1, exp_reward=0, max_hp=None):
+        """
+        参加者を1体追加
+
+        Returns:
+            int: 追加した参加者の番号
+        """
+        self.name_id.append(self._intern_name(name))
+        self.hp.append(hp)
+        self.max_hp.append(hp if max_hp is None else max_hp)
+        self.attack.append(attack)
+        self.defense.append(defense)
+        self.level.append(level)
+        self.exp_reward.append(exp_reward)
+        return len(self.hp) - 1
+
+    def add_character(self, character):
+        """Characterオブジェクトのステータスを追加"""
+        return self.append(
+            character.name,
+            character.hp,
+            character.attack,
+            character.defense,
+            character.level,
+            character.exp_reward,
+            character.max_hp
+        )
+
+    def spawn_enemies(self, player_level, count, rng=None, registry=None):
+        """
+        create_enemy と同じ規則で敵をcount体まとめて追加
+
+        Args:
+            player_level: プレイヤーのレベル
+            count: 追加する数
+            rng: 乱数生成器（省略時はrandomモジュール）
+            registry: EnemyRegistry（省略時は既定のデータ）
+        """
+        rng = rng or random
+        registry = registry or get_registry()
+        name_ids = [self._intern_name(enemy["name"]) for enemy in registry.types]
+        for _ in range(count):
+            type_index = registry.choose_type(player_level, rng)
+            hp, attack, defense, exp_reward = registry.stats(type_index, player_level)
+            self.name_id.append(name_ids[type_index])
+            self.hp.append(hp)
+            self.max_hp.append(hp)
+            self.attack.append(attack)
+            self.defense.append(defense)
+            self.level.append(registry.enemy_level(player_level, rng))
+            self.exp_reward.append(exp_reward)
+
+    def name(self, index):
+        """参加者の名前を取得"""
+        return self.names[self.name_id[index]]
+
+    def is_alive(self, index):
+        """参加者が生存しているかチェック"""
+        return self.hp[index] > 0
+
+    def alive_indices(self):
+        """生存している参加者の番号のリスト"""
+        return [i for i, hp in enumerate(self.hp) if hp > 0]
+
+    def apply_damage(self, indices, damages):
+        """
+        複数の参加者にまとめてダメージを与える
+
+        Args:
+            indices: 参加者の番号のイテラブル
+            damages: 各参加者へのダメージ（indicesと同じ順序）
+        """
+        hp = self.hp
+        for index, damage in zip(indices, damages):
+            hp[index] = max(0, hp[index] - damage)
+
+    def damage_all(self, damage):
+        """全員に同じダメージを与える（列はその場で書き換える）"""
+        hp = self.hp
+        for index, value in enumerate(hp):
+            if value:
+                hp[index] = value - damage if value > damage else 0
+
+    def heal_all(self, amount):
+        """全員のHPを回復する（最大HPを上限とする、列はその場で書き換える）"""
+        hp = self.hp
+        for index, max_hp in enumerate(self.max_hp):
+            value = hp[index] + amount
+            hp[index] = value if value < max_hp else max_hp
+
+    def remove_dead(self):
+        """
+        HPが0の参加者を取り除いて詰める（生存している参加者を前に移し、末尾を切り詰める）
+
+        Returns:
+            int: 取り除いた数
+        """
+        alive = self.alive_indices()
+        removed = len(self) - len(alive)
+        if removed:
+            for values in self._columns():
+                for position, index in enumerate(alive):
+                    values[position] = values[index]
+                del values[len(alive):]
+        return removed
+
+    def clear(self):
+        """全ての参加者を取り除く（登録済みの名前は残す）"""
+        for values in self._columns():
+            del values[:]
+
+    def _columns(self):
+        """全ての列の配列"""
+        return (self.name_id, self.hp, self.max_hp, self.attack, self.defense, self.level, self.exp_reward)
+
+    def to_character(self, index):
+        """参加者の1体をCharacterオブジェクトとして取り出す"""
+        return Character(
+            name=self.name(index),
+            hp=self.hp[index],
+            max_hp=self.max_hp[index],
+            mp=0,
+            max_mp=0,
+            attack=self.attack[index],
+            defense=self.defense[index],
+            level=self.level[index],
+            items=NO_ITEMS,
+            exp_reward=self.exp_reward[index]
+        )
+
+    def nbytes(self):
+        """列の配列が使用しているバイト数"""
+        return sum(values.itemsize * len(values) for values in self._columns())
@@ -1,64 +1,561 @@
 import json
+import os
+import tempfile
+import threading
 from datetime import datetime
 from pathlib import Path
 
+import metrics
+from battle_history import merge_history_data, rebuild_history_data
+from serializers import CURRENT_SCHEMA_VERSION, HEADER_PLAYER_FIELDS, SERIALIZERS, get_serializer, make_header, migrate
+
+MANIFEST_FILENAME = "index.json"
+JOURNAL_EXTENSION = ".journal"
+
+
+def _default_file_mode():
+    """新しく作るファイルのパーミッション（open() と同じく 0o666 から umask を除いたもの）"""
+    # umask は設定しないと取得できないので、スレッドが動き出す前のimport時に1度だけ調べる
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+DEFAULT_FILE_MODE = _default_file_mode()
+
+
+def atomic_write(path, data):
+    """
+    一時ファイルに書いてからリネームすることで、ファイルをアトミックに置き換える
+    （書き込み途中でクラッシュしても元のファイルは壊れない）
+
+    Args:
+        path: 書き込み先のパス
+        data: 書き込むバイト列
+    """
+    path = Path(path)
+    # mkstemp の一時ファイルは 0600 なので、置き換える前のファイル（無ければ通常の新規ファイル）と同じにする
+    try:
+        mode = path.stat().st_mode & 0o777
+    except FileNotFoundError:
+        mode = DEFAULT_FILE_MODE
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            if hasattr(os, "fchmod"):
+                os.fchmod(f.fileno(), mode)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+    # リネームをディレクトリに反映させる（対応していないOSでは省略）
+    try:
+        dir_fd = os.open(path.parent, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+def build_save_data(player, include_history=True):
+    """
+    プレイヤーの現在の状態からセーブデータを作成
+    （所持品もコピーするので、作成後にプレイヤーが変化しても影響しない）
+
+    Args:
+        player: Characterオブジェクト
+        include_history: 戦闘履歴を含めるか（含めない場合は履歴のエンコードを行わない）
+
+    Returns:
+        dict: セーブデータ
+    """
+    save_data = {
+        "schema_version": CURRENT_SCHEMA_VERSION,  # セーブデータのバージョン
+        "save_date": datetime.now().isoformat(),
+        "player": {
+            "name": player.name,
+            "level": player.level,
+            "exp": player.exp,
+            "hp": player.hp,
+            "max_hp": player.max_hp,
+            "mp": player.mp,
+            "max_mp": player.max_mp,
+            "attack": player.attack,
+            "defense": player.defense,
+            "items": dict(player.items),
+            "total_battles": player.total_battles,
+            "total_victories": player.total_victories
+        }
+    }
+    if include_history and player.history is not None:
+        save_data["player"]["history"] = player.history.to_save_data()
+    return save_data
+
+
+def build_header_data(player):
+    """
+    セーブ選択画面用の項目だけのセーブデータを作成（差分セーブのマニフェスト用）
+
+    Args:
+        player: Characterオブジェクト
+
+    Returns:
+        dict: make_header に渡せるセーブデータ
+    """
+    return {
+        "schema_version": CURRENT_SCHEMA_VERSION,
+        "save_date": datetime.now().isoformat(),
+        "player": {field: getattr(player, field) for field in HEADER_PLAYER_FIELDS},
+    }
+
+
+def build_delta(player):
+    """
+    前回のセーブから変更されたフィールドだけの差分レコードを作成し、変更の記録をリセット
+
+    Args:
+        player: 変更を記録中（player.changes が集合）のCharacterオブジェクト
+
+    Returns:
+        dict: 差分レコード
+    """
+    changes = {}
+    for field in player.changes:
+        value = getattr(player, field)
+        if field == "items":
+            value = dict(value)
+        elif field == "history":
+            value = value.take_delta()  # 前回のセーブ以降に追記された戦闘だけ
+        changes[field] = value
+    player.changes.clear()
+    return {"save_date": datetime.now().isoformat(), "player": changes}
+
+
+def _merge_player_fields(older, newer):
+    """
+    プレイヤーのフィールドをまとめる（値は変更後の値なので新しい方で上書き、
+    戦闘履歴は追記された行なので連結する）
+    """
+    merged = {**older, **newer}
+    if "history" in older and "history" in newer:
+        merged["history"] = merge_history_data(older["history"], newer["history"])
+    return merged
+
+
+def merge_deltas(older, newer):
+    """2つの差分レコードを1つにまとめる"""
+    return {"save_date": newer["save_date"], "player": _merge_player_fields(older["player"], newer["player"])}
+
+
+def apply_delta(save_data, delta):
+    """セーブデータに差分レコードを適用"""
+    save_data["save_date"] = delta["save_date"]
+    save_data["player"] = _merge_player_fields(save_data["player"], delta["player"])
+
+
+def save_header(save_data, slot):
+    """
+    セーブデータからセーブ選択画面用の情報を取り出す
+
+    Args:
+        save_data: セーブファイルの内容（現在のスキーマ）
+        slot: セーブスロット番号
+
+    Returns:
+        dict: セーブ情報
+    """
+    return {"slot": slot, **make_header(save_data)}
+
 
 class SaveSystem:
     """セーブ/ロードを管理するクラス"""
     
-    def __init__(self, save_dir="saves"):
+    def __init__(self, save_dir="saves", write_behind=False, serializer="json", delta=False,
+                 compact_threshold=16 * 1024):
         """
         Args:
             save_dir: セーブファイルを保存するディレクトリ
+            write_behind: Trueならバックグラウンドのスレッドでファイルに書き込む
+                （同じスロットへの連続したセーブは1回の書き込みにまとめられる）
+            serializer: セーブファイルの形式（"json" / "binary" またはシリアライザー）
+                他の形式で保存されたスロットも読み込め、次のセーブでこの形式に置き換わる
+            delta: Trueなら2回目以降のセーブは変更されたフィールドだけを
+                スロットのジャーナルファイルに追記する
+            compact_threshold: ジャーナルがこのバイト数を超えたら、バックグラウンドで
+                セーブファイルに統合する
         """
         self.save_dir = Path(save_dir)
         self.save_dir.mkdir(exist_ok=True)
+        self.serializer = get_serializer(serializer)
+        self.manifest_path = self.save_dir / MANIFEST_FILENAME
+        # マニフェストのメモリキャッシュ（ファイルの更新時刻で有効性を確認）
+        self._manifest = None
+        self._manifest_mtime = None
+        self._manifest_lock = threading.RLock()
+        
+        # バックグラウンド書き込み用
+        self.write_behind = write_behind
+        self._pending = {}  # スロット番号 -> 書き込み待ちのセーブデータ
+        self._in_flight = None  # 書き込み中の (スロット番号, セーブデータ)
+        self._failed = set()  # 書き込みに失敗したスロット番号
+        self._cond = threading.Condition()
+        self._writer = None
+        self._closing = False
+        
+        # 差分セーブ用
+        self.delta = delta
+        self.compact_threshold = compact_threshold
+        self._tracking = {}  # スロット番号 -> 変更を記録中のCharacter（そのスロットのセーブが基準）
+        self._journal_bases = {}  # スロット番号 -> 最後に書いたセーブファイルの日時
+        self._compact_requests = set()  # ジャーナルの統合を待っているスロット番号
+        self._slot_lock = threading.RLock()  # セーブファイルとジャーナルの読み書き用
+    
+    def _slot_path(self, slot, serializer=None):
+        """スロット番号からセーブファイルのパスを取得"""
+        extension = (serializer or self.serializer).extension
+        return self.save_dir / f"save_slot_{slot}{extension}"
     
-    def save_game(self, player, slot=1):
+    def _journal_path(self, slot):
+        """スロット番号からジャーナルファイルのパスを取得"""
+        return self.save_dir / f"save_slot_{slot}{JOURNAL_EXTENSION}"
+    
+    def _find_slot_file(self, slot):
+        """
+        スロットのセーブファイルを探す（現在の形式を優先し、無ければ他の形式）
+        
+        Returns:
+            tuple: (パス, シリアライザー)、見つからない場合は (None, None)
+        """
+        for serializer in (self.serializer, *SERIALIZERS.values()):
+            filename = self._slot_path(slot, serializer)
+            if filename.exists():
+                return filename, serializer
+        return None, None
+    
+    def _load_manifest(self):
+        """
+        マニフェスト（全スロットのセーブ情報の索引）を取得
+        ファイルが更新されていなければメモリ上のキャッシュを返す
+        
+        Returns:
+            dict: スロット番号（文字列）-> セーブ情報
+        """
+        with self._manifest_lock:
+            try:
+                mtime = self.manifest_path.stat().st_mtime_ns
+            except FileNotFoundError:
+                return self._rebuild_manifest()
+            
+            if self._manifest is not None and mtime == self._manifest_mtime:
+                return self._manifest
+            
+            try:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    self._manifest = json.load(f)["slots"]
+                self._manifest_mtime = mtime
+            except (OSError, ValueError, KeyError):
+                return self._rebuild_manifest()
+            return self._manifest
+    
+    def _write_manifest(self, manifest):
+        """マニフェストを書き込んでキャッシュを更新"""
+        with self._manifest_lock:
+            data = json.dumps({"version": 1, "slots": manifest}, ensure_ascii=False)
+            atomic_write(self.manifest_path, data.encode('utf-8'))
+            self._manifest = manifest
+            self._manifest_mtime = self.manifest_path.stat().st_mtime_ns
+    
+    def _update_manifest(self, slot, header):
+        """マニフェストの1スロット分を更新（headerがNoneなら削除）"""
+        with self._manifest_lock:
+            manifest = dict(self._load_manifest())
+            if header is None:
+                manifest.pop(str(slot), None)
+            else:
+                manifest[str(slot)] = header
+            self._write_manifest(manifest)
+    
+    def _rebuild_manifest(self):
+        """セーブファイルを走査してマニフェストを作り直す（マニフェストが無い・壊れている場合）"""
+        manifest = {}
+        for serializer in (*SERIALIZERS.values(), self.serializer):
+            for filename in self.save_dir.glob(f"save_slot_*{serializer.extension}"):
+                slot = filename.stem.removeprefix("save_slot_")
+                try:
+                    if self._journal_path(slot).exists():
+                        manifest[slot] = save_header(self._read_slot(slot), int(slot))
+                    else:
+                        with open(filename, 'rb') as f:
+                            manifest[slot] = {"slot": int(slot), **serializer.read_header(f)}
+                except (OSError, ValueError, KeyError):
+                    continue
+        self._write_manifest(manifest)
+        return manifest
+    
+    @metrics.timed("save")
+    def save_game(self, player, slot=1, background=False):
         """
         ゲームをセーブする
         
         Args:
             player: Characterオブジェクト
             slot: セーブスロット番号（デフォルト: 1）
+            background: Trueなら書き込みの完了を待たない（write_behind が有効な場合のみ）
         
         Returns:
-            bool: 保存成功時True
+            bool: 保存成功時True（backgroundの場合は受け付けた時点でTrue）
         """
         try:
-            filename = self.save_dir / f"save_slot_{slot}.json"
-            
-            # プレイヤーデータを辞書化
-            save_data = {
-                "version": "1.0",  # セーブデータのバージョン
-                "save_date": datetime.now().isoformat(),
-                "player": {
-                    "name": player.name,
-                    "level": player.level,
-                    "exp": player.exp,
-                    "exp_to_next": player.exp_to_next,
-                    "hp": player.hp,
-                    "max_hp": player.max_hp,
-                    "mp": player.mp,
-                    "max_mp": player.max_mp,
-                    "attack": player.attack,
-                    "defense": player.defense,
-                    "items": player.items,
-                    "total_battles": player.total_battles,
-                    "total_victories": player.total_victories
-                }
-            }
+            # プレイヤーデータを辞書化（この時点の状態を確定させる）
+            # 差分セーブではセーブ全体は書かないので、マニフェスト用の項目だけを作る
+            delta = self._take_delta(player, slot)
+            save_data = build_save_data(player) if delta is None else build_header_data(player)
+        except Exception as e:
+            print(f"セーブエラー: {e}")
+            return False
+        
+        if not self.write_behind:
+            return self._write_slot(slot, save_data, delta)
+        
+        with self._cond:
+            # 同じスロットの書き込み待ちは新しいデータで置き換える（差分同士はまとめる）
+            previous = self._pending.get(slot)
+            if previous is not None and delta is not None:
+                _, previous_delta = previous
+                if previous_delta is None:
+                    # 書き込み待ちのセーブ全体を置き換えるので、こちらもセーブ全体を書く
+                    delta = None
+                    save_data = build_save_data(player)
+                else:
+                    delta = merge_deltas(previous_delta, delta)
+            self._pending[slot] = (save_data, delta)
+            self._failed.discard(slot)
+            self._start_writer()
+            self._cond.notify_all()
+        
+        if background:
+            return True
+        
+        self.flush()
+        with self._cond:
+            return slot not in self._failed
+    
+    def _take_delta(self, player, slot):
+        """
+        差分セーブできる場合は差分レコードを作成し、できない場合はセーブ全体を書くための準備をする
+        
+        Returns:
+            dict: 差分レコード（セーブ全体を書く場合はNone）
+        """
+        if not self.delta:
+            return None
+        
+        with self._slot_lock:
+            if self._tracking.get(slot) is player and player.changes is not None:
+                return build_delta(player)
             
-            # JSONファイルに保存
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(save_data, f, indent=2, ensure_ascii=False)
+            # このスロットのセーブ全体を基準に、ここから変更を記録する
+            for tracked_slot, tracked in list(self._tracking.items()):
+                if tracked is player:
+                    del self._tracking[tracked_slot]
+            self._tracking[slot] = player
+            player.changes = set()
+            if player.history is not None:
+                player.history.saved = len(player.history)  # 全体のセーブに含まれている
+            return None
+    
+    @metrics.timed("save", "write")
+    def _write_slot(self, slot, save_data, delta=None):
+        """
+        セーブデータをファイルに書き込み、マニフェストを更新する
+        
+        Args:
+            slot: セーブスロット番号
+            save_data: deltaがNoneならファイルに書くセーブデータ全体、それ以外はマニフェスト用の項目
+                （build_header_data）
+            delta: ジャーナルに追記する差分レコード
+        """
+        try:
+            with self._slot_lock:
+                if delta is None:
+                    self._write_snapshot(slot, save_data)
+                else:
+                    self._append_journal(slot, delta)
             
+            self._update_manifest(slot, save_header(save_data, slot))
             return True
         
         except Exception as e:
+            # 差分が失われた可能性があるので、次のセーブは全体を書く
+            with self._slot_lock:
+                self._tracking.pop(slot, None)
             print(f"セーブエラー: {e}")
             return False
     
+    def _write_snapshot(self, slot, save_data):
+        """セーブデータ全体をファイルに書き込み、ジャーナルを削除する"""
+        atomic_write(self._slot_path(slot), self.serializer.dumps(save_data))
+        self._journal_bases[slot] = save_data["save_date"]
+        
+        # 他の形式の古いセーブファイルが残っていれば削除
+        for serializer in SERIALIZERS.values():
+            if serializer.extension != self.serializer.extension:
+                self._slot_path(slot, serializer).unlink(missing_ok=True)
+        
+        # ジャーナルは新しいセーブファイルに含まれている
+        # （削除前に中断しても、基準の日時が違うジャーナルは読み込み時に無視される）
+        self._journal_path(slot).unlink(missing_ok=True)
+    
+    def _append_journal(self, slot, delta):
+        """差分レコードをジャーナルに追記する（大きくなったら統合を依頼）"""
+        path = self._journal_path(slot)
+        if not path.exists():
+            # 1行目には基準となるセーブファイルの日時を書く
+            base = self._journal_bases.get(slot)
+            if base is None:
+                filename, serializer = self._find_slot_file(slot)
+                if filename is None:
+                    raise FileNotFoundError(f"スロット {slot} のセーブファイルがありません")
+                base = serializer.loads(filename.read_bytes())["save_date"]
+            lines = [{"base": base}, delta]
+        else:
+            lines = [delta]
+        
+        data = "".join(json.dumps(line, ensure_ascii=False, separators=(",", ":")) + "\n" for line in lines)
+        with open(path, 'ab') as f:
+            f.write(data.encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+        
+        if size > self.compact_threshold:
+            with self._cond:
+                self._compact_requests.add(slot)
+                self._start_writer()
+                self._cond.notify_all()
+    
+    def _read_slot(self, slot):
+        """
+        セーブファイルを読み、ジャーナルの差分を順番に適用する
+        
+        Returns:
+            dict: 現在のスキーマのセーブデータ（スロットが空の場合はNone）
+        """
+        with self._slot_lock:
+            filename, serializer = self._find_slot_file(slot)
+            if filename is None:
+                return None
+            
+            # 古いスキーマのセーブデータは読み込み時に移行する
+            save_data = migrate(serializer.loads(filename.read_bytes()))
+            
+            try:
+                with open(self._journal_path(slot), 'r', encoding='utf-8') as f:
+                    lines = f.readlines()
+            except FileNotFoundError:
+                return save_data
+        
+        base = save_data["save_date"]
+        for i, line in enumerate(lines):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break  # 書き込み途中で中断した行以降は無視
+            if i == 0:
+                if record.get("base") != base:
+                    break  # 別のセーブファイルを基準にした古いジャーナル
+                continue
+            apply_delta(save_data, record)
+        return save_data
+    
+    @metrics.timed("save")
+    def compact(self, slot):
+        """ジャーナルをセーブファイルに統合する（戦闘履歴は差分ごとのブロックを詰め直す）"""
+        with self._slot_lock:
+            if not self._journal_path(slot).exists():
+                return
+            save_data = self._read_slot(slot)
+            if save_data is not None:
+                player = save_data["player"]
+                if player.get("history"):
+                    player["history"] = rebuild_history_data(player["history"])
+                self._write_snapshot(slot, save_data)
+    
+    def _start_writer(self):
+        """書き込みスレッドを起動（起動済みなら何もしない）"""
+        if self._writer is None or not self._writer.is_alive():
+            self._closing = False
+            self._writer = threading.Thread(target=self._writer_loop, name="save-writer", daemon=True)
+            self._writer.start()
+    
+    def _writer_loop(self):
+        """書き込み待ちのセーブデータを順番にファイルへ書き込み、空いた時にジャーナルを統合する"""
+        while True:
+            with self._cond:
+                while not self._pending and not self._compact_requests and not self._closing:
+                    self._cond.wait()
+                compacting = not self._pending
+                if compacting:
+                    if self._closing or not self._compact_requests:
+                        return
+                    slot = self._compact_requests.pop()
+                else:
+                    slot = next(iter(self._pending))
+                    save_data, delta = self._pending.pop(slot)
+                    self._in_flight = (slot, save_data)
+            
+            if compacting:
+                try:
+                    self.compact(slot)
+                except Exception as e:
+                    print(f"ジャーナル統合エラー: {e}")
+                continue
+            
+            ok = self._write_slot(slot, save_data, delta)
+            
+            with self._cond:
+                self._in_flight = None
+                if not ok:
+                    self._failed.add(slot)
+                self._cond.notify_all()
+    
+    @metrics.timed("save")
+    def flush(self):
+        """書き込み待ちのセーブデータが全て書き込まれるまで待つ"""
+        with self._cond:
+            while self._pending or self._in_flight is not None:
+                self._cond.wait()
+    
+    def close(self):
+        """書き込み待ちを全て書き込んでから書き込みスレッドを終了する"""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+    
+    def _unwritten_headers(self):
+        """まだファイルに書き込まれていないセーブのセーブ情報"""
+        with self._cond:
+            unwritten = {slot: save_data for slot, (save_data, _) in self._pending.items()}
+            if self._in_flight is not None:
+                slot, save_data = self._in_flight
+                unwritten.setdefault(slot, save_data)
+        return {str(slot): save_header(data, slot) for slot, data in unwritten.items()}
+    
+    @metrics.timed("save")
     def load_game(self, slot=1):
         """
         セーブデータを読み込む
@@ -69,24 +566,26 @@ class SaveSystem:
         Returns:
             dict: プレイヤーデータ（失敗時はNone）
         """
+        if self.write_behind:
+            self.flush()
+        
         try:
-            filename = self.save_dir / f"save_slot_{slot}.json"
+            save_data = self._read_slot(slot)
             
-            if not filename.exists():
+            if save_data is None:
                 return None
             
-            with open(filename, 'r', encoding='utf-8') as f:
-                save_data = json.load(f)
-            
             return save_data["player"]
         
         except Exception as e:
             print(f"ロードエラー: {e}")
             return None
     
+    @metrics.timed("save")
     def get_save_info(self, slot=1):
         """
         セーブデータの情報を取得（セーブ選択画面用）
+        セーブファイルは開かず、マニフェストから取得する
         
         Args:
             slot: セーブスロット番号
@@ -95,29 +594,16 @@ class SaveSystem:
             dict: セーブ情報（存在しない場合はNone）
         """
         try:
-            filename = self.save_dir / f"save_slot_{slot}.json"
-            
-            if not filename.exists():
-                return None
-            
-            with open(filename, 'r', encoding='utf-8') as f:
-                save_data = json.load(f)
-            
-            player_data = save_data["player"]
-            
-            return {
-                "slot": slot,
-                "name": player_data["name"],
-                "level": player_data["level"],
-                "save_date": save_data["save_date"],
-                "total_battles": player_data["total_battles"],
-                "total_victories": player_data["total_victories"]
-            }
+            unwritten = self._unwritten_headers()
+            if str(slot) in unwritten:
+                return unwritten[str(slot)]
+            return self._load_manifest().get(str(slot))
         
         except Exception as e:
             print(f"セーブ情報取得エラー: {e}")
             return None
     
+    @metrics.timed("save")
     def list_saves(self, max_slots=3):
         """
         全てのセーブスロットの情報を取得
@@ -128,12 +614,14 @@ class SaveSystem:
         Returns:
             list: セーブ情報のリスト
         """
-        saves = []
-        for slot in range(1, max_slots + 1):
-            info = self.get_save_info(slot)
-            saves.append(info)
-        return saves
+        try:
+            manifest = {**self._load_manifest(), **self._unwritten_headers()}
+        except Exception as e:
+            print(f"セーブ情報取得エラー: {e}")
+            manifest = {}
+        return [manifest.get(str(slot)) for slot in range(1, max_slots + 1)]
     
+    @metrics.timed("save")
     def delete_save(self, slot=1):
         """
         セーブデータを削除
@@ -144,11 +632,20 @@ class SaveSystem:
         Returns:
             bool: 削除成功時True
         """
+        if self.write_behind:
+            self.flush()
+        
         try:
-            filename = self.save_dir / f"save_slot_{slot}.json"
+            filename, _ = self._find_slot_file(slot)
             
-            if filename.exists():
-                filename.unlink()
+            if filename is not None:
+                with self._slot_lock:
+                    for serializer in SERIALIZERS.values():
+                        self._slot_path(slot, serializer).unlink(missing_ok=True)
+                    self._journal_path(slot).unlink(missing_ok=True)
+                    self._tracking.pop(slot, None)
+                    self._journal_bases.pop(slot, None)
+                self._update_manifest(slot, None)
                 return True
             return False
         
@@ -0,0 +1,289 @@
+"""セーブデータのシリアライザー（JSON・バイナリ）とスキーマの移行"""
+
+import json
+import struct
+import zlib
+
+# 現在のセーブデータのスキーマバージョン
+#   1: "version": "1.0" を持つ最初の形式
+#   2: 整数の "schema_version" を持ち、exp_to_next をレベルから再計算する形式
+CURRENT_SCHEMA_VERSION = 2
+
+# セーブ選択画面用に、本体を読まずに取り出せるようにする項目
+HEADER_PLAYER_FIELDS = ("name", "level", "total_battles", "total_victories")
+
+
+def schema_version(save_data):
+    """セーブデータのスキーマバージョンを取得（古い形式は "version" 文字列から判定）"""
+    if "schema_version" in save_data:
+        return save_data["schema_version"]
+    return 1
+
+
+def _migrate_v1_to_v2(save_data):
+    """v1 -> v2: バージョン文字列を整数にし、レベルから求まる exp_to_next を削除"""
+    player = dict(save_data["player"])
+    player.pop("exp_to_next", None)
+    player.setdefault("items", {"回復薬": 3, "魔法の水": 2})
+    player.setdefault("total_battles", 0)
+    player.setdefault("total_victories", 0)
+    return {
+        "schema_version": 2,
+        "save_date": save_data["save_date"],
+        "player": player,
+    }
+
+
+# バージョン -> 次のバージョンへ移行する関数
+MIGRATIONS = {
+    1: _migrate_v1_to_v2,
+}
+
+
+def migrate(save_data):
+    """
+    セーブデータを現在のスキーマまで順番に移行する
+
+    Args:
+        save_data: 読み込んだセーブデータ
+
+    Returns:
+        dict: 現在のスキーマのセーブデータ
+    """
+    version = schema_version(save_data)
+    if version > CURRENT_SCHEMA_VERSION:
+        raise ValueError(f"未対応のセーブデータのバージョンです: {version}")
+    while version < CURRENT_SCHEMA_VERSION:
+        save_data = MIGRATIONS[version](save_data)
+        version = schema_version(save_data)
+    return save_data
+
+
+def make_header(save_data):
+    """セーブデータからヘッダー（セーブ選択画面用の項目）を作成"""
+    player = save_data["player"]
+    header = {field: player[field] for field in HEADER_PLAYER_FIELDS}
+    header["save_date"] = save_data["save_date"]
+    return header
+
+
+class JsonSerializer:
+    """JSON形式（テキスト）のシリアライザー"""
+
+    name = "json"
+    extension = ".json"
+
+    def dumps(self, save_data):
+        """セーブデータをバイト列に変換"""
+        return json.dumps(save_data, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+
+    def loads(self, data):
+        """バイト列からセーブデータを復元（スキーマの移行は行わない）"""
+        return json.loads(data)
+
+    def read_header(self, f):
+        """ファイルからヘッダーを取得（JSONでは全体を読む必要がある）"""
+        return make_header(migrate(json.load(f)))
+
+
+# バイナリ形式の型タグ
+_NONE, _FALSE, _TRUE, _INT, _FLOAT, _STR, _LIST, _DICT, _KEY = range(9)
+
+# よく使う辞書のキーは番号だけで保存する（読み込み互換のため、追加は末尾のみ）
+KNOWN_KEYS = (
+    "schema_version", "save_date", "player", "name", "level", "exp", "hp", "max_hp",
+    "mp", "max_mp", "attack", "defense", "items", "total_battles", "total_victories",
+    "回復薬", "魔法の水",
+)
+_KEY_INDEX = {key: i for i, key in enumerate(KNOWN_KEYS)}
+
+
+def _write_varint(out, value):
+    """非負整数を可変長で書き込む"""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    """可変長の非負整数を読み込む"""
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _encode(value, out):
+    """値を型タグ付きのバイナリに変換して out に追加"""
+    if value is None:
+        out.append(_NONE)
+    elif value is True:
+        out.append(_TRUE)
+    elif value is False:
+        out.append(_FALSE)
+    elif isinstance(value, int):
+        out.append(_INT)
+        _write_varint(out, value * 2 if value >= 0 else -value * 2 - 1)  # zigzag
+    elif isinstance(value, float):
+        out.append(_FLOAT)
+        out += struct.pack(">d", value)
+    elif isinstance(value, str):
+        encoded = value.encode('utf-8')
+        out.append(_STR)
+        _write_varint(out, len(encoded))
+        out += encoded
+    elif isinstance(value, (list, tuple)):
+        out.append(_LIST)
+        _write_varint(out, len(value))
+        for item in value:
+            _encode(item, out)
+    elif isinstance(value, dict):
+        out.append(_DICT)
+        _write_varint(out, len(value))
+        for key, item in value.items():
+            key = str(key)
+            if key in _KEY_INDEX:
+                out.append(_KEY)
+                _write_varint(out, _KEY_INDEX[key])
+            else:
+                _encode(key, out)
+            _encode(item, out)
+    else:
+        raise TypeError(f"保存できない型です: {type(value).__name__}")
+
+
+def _decode(data, pos):
+    """バイナリから値を1つ復元"""
+    tag = data[pos]
+    pos += 1
+    if tag == _NONE:
+        return None, pos
+    if tag == _TRUE:
+        return True, pos
+    if tag == _FALSE:
+        return False, pos
+    if tag == _INT:
+        raw, pos = _read_varint(data, pos)
+        return (raw >> 1) if not raw & 1 else -((raw + 1) >> 1), pos
+    if tag == _FLOAT:
+        return struct.unpack_from(">d", data, pos)[0], pos + 8
+    if tag == _STR:
+        length, pos = _read_varint(data, pos)
+        return bytes(data[pos:pos + length]).decode('utf-8'), pos + length
+    if tag == _LIST:
+        length, pos = _read_varint(data, pos)
+        items = []
+        for _ in range(length):
+            item, pos = _decode(data, pos)
+            items.append(item)
+        return items, pos
+    if tag == _KEY:
+        index, pos = _read_varint(data, pos)
+        return KNOWN_KEYS[index], pos
+    if tag == _DICT:
+        length, pos = _read_varint(data, pos)
+        result = {}
+        for _ in range(length):
+            key, pos = _decode(data, pos)
+            result[key], pos = _decode(data, pos)
+        return result, pos
+    raise ValueError(f"不正な型タグです: {tag}")
+
+
+def encode_value(value):
+    """値をバイナリに変換"""
+    out = bytearray()
+    _encode(value, out)
+    return bytes(out)
+
+
+def decode_value(data):
+    """バイナリから値を復元"""
+    value, _ = _decode(memoryview(data), 0)
+    return value
+
+
+class BinarySerializer:
+    """
+    コンパクトなバイナリ形式のシリアライザー
+
+    ファイル構成:
+        マジック "RPGS" (4バイト) / フラグ (1バイト) / スキーマバージョン (2バイト)
+        ヘッダー長 (4バイト) / 本体の長さ (4バイト)
+        ヘッダー（セーブ選択画面用の項目）
+        本体（セーブデータ全体、小さくなる場合はzlib圧縮）
+    ヘッダーは本体を展開・復元せずに読み出せる。
+    """
+
+    name = "binary"
+    extension = ".sav"
+    MAGIC = b"RPGS"
+    PREFIX = struct.Struct(">4sBHII")
+    FLAG_COMPRESSED = 0x01
+
+    def dumps(self, save_data):
+        """セーブデータをバイト列に変換"""
+        header = encode_value(make_header(save_data))
+        body = encode_value(save_data)
+        flags = 0
+        compressed = zlib.compress(body)
+        if len(compressed) < len(body):
+            body = compressed
+            flags |= self.FLAG_COMPRESSED
+        prefix = self.PREFIX.pack(self.MAGIC, flags, schema_version(save_data), len(header), len(body))
+        return prefix + header + body
+
+    def _read_prefix(self, data):
+        """
+        先頭部分を読み取る
+
+        Raises:
+            ValueError: 形式が正しくない・途中で切れている場合
+        """
+        if len(data) < self.PREFIX.size:
+            raise ValueError("セーブファイルが途中で切れています")
+        magic, flags, version, header_len, body_len = self.PREFIX.unpack_from(data)
+        if magic != self.MAGIC:
+            raise ValueError("セーブファイルの形式が正しくありません")
+        return flags, version, header_len, body_len
+
+    def loads(self, data):
+        """バイト列からセーブデータを復元（スキーマの移行は行わない）"""
+        flags, _, header_len, body_len = self._read_prefix(data)
+        start = self.PREFIX.size + header_len
+        body = data[start:start + body_len]
+        if len(body) < body_len:
+            raise ValueError("セーブファイルが途中で切れています")
+        if flags & self.FLAG_COMPRESSED:
+            try:
+                body = zlib.decompress(body)
+            except zlib.error as e:
+                raise ValueError(f"セーブファイルが壊れています: {e}") from None
+        return decode_value(body)
+
+    def read_header(self, f):
+        """ファイルの先頭部分だけを読んでヘッダーを取得"""
+        _, _, header_len, _ = self._read_prefix(f.read(self.PREFIX.size))
+        header = f.read(header_len)
+        if len(header) < header_len:
+            raise ValueError("セーブファイルが途中で切れています")
+        return decode_value(header)
+
+
+SERIALIZERS = {
+    JsonSerializer.name: JsonSerializer(),
+    BinarySerializer.name: BinarySerializer(),
+}
+
+
+def get_serializer(serializer):
+    """名前またはシリアライザーのインスタンスからシリアライザーを取得"""
+    if isinstance(serializer, str):
+        return SERIALIZERS[serializer]
+    return serializer
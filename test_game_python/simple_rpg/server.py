@@ -0,0 +1,420 @@
+"""asyncioによる複数セッションのゲームサーバー（1接続 = 1つの独立したゲーム）
+
+クライアントは1行に1つのコマンドを送り、サーバーは1行のJSONで応答する。
+コマンドはテキスト（"magic ファイア"）でもJSON（{"cmd": "magic", "args": ["ファイア"]}）でもよい。
+
+    タイトル: login <プレイヤーID> / new [名前] / load <スロット> / saves / help / quit
+    メニュー: battle / auto <回数> [回復する%] / rest / status / save <スロット> / load <スロット> / saves / quit
+    戦闘中  : attack / magic <魔法名> / item <アイテム名> / escape / status / quit
+
+応答は {"ok": true, "state": "menu", ...} または {"ok": false, "error": "..."} の形式。
+戦闘のコマンドには BattleEngine のイベントのリストが "events" として含まれる。
+
+セッションごとにプレイヤー・戦闘・乱数生成器を持ち、セーブは全セッションで共有する
+SqliteSaveStore（プレイヤーIDごと）にスレッドプール経由で書き込むので、
+イベントループはディスクI/Oで止まらない。
+
+使い方（simple_rpg ディレクトリで実行）:
+    python -m server --port 8765 --db saves/server.db
+    （別の端末から nc localhost 8765 などで接続）
+"""
+
+import asyncio
+import itertools
+import json
+import random
+import sys
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from autobattle import MAX_AUTO_BATTLES, GrindPolicy, auto_battle
+from character import Character, START_HP, START_MP, START_ATTACK, START_DEFENSE
+from engine import BattleEngine
+from enemy_registry import create_enemy
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_DB_PATH = "saves/server.db"
+
+MAX_LINE = 4096  # 1行の最大バイト数
+AUTO_CHUNK = 50  # auto コマンドでイベントループに制御を戻すまでに行う戦闘回数
+MAX_SLOTS = 3
+
+ACTION_COMMANDS = ("attack", "magic", "item", "escape")
+
+
+class CommandError(ValueError):
+    """クライアントのコマンドが不正"""
+
+
+def parse_command(line):
+    """
+    1行のコマンドを (コマンド, 引数のリスト) に変換
+
+    Raises:
+        CommandError: JSONが不正な場合
+    """
+    line = line.strip()
+    if line.startswith("{"):
+        try:
+            message = json.loads(line)
+            return str(message["cmd"]).lower(), [str(arg) for arg in message.get("args", [])]
+        except (ValueError, KeyError, TypeError, AttributeError):
+            raise CommandError("JSONのコマンドは {\"cmd\": ..., \"args\": [...]} の形式で送ってください") from None
+    words = line.split()
+    if not words:
+        return "", []
+    return words[0].lower(), words[1:]
+
+
+def _int_arg(args, index, name, default=None):
+    """整数の引数を取得"""
+    if len(args) <= index:
+        if default is None:
+            raise CommandError(f"{name}を指定してください")
+        return default
+    try:
+        return int(args[index])
+    except ValueError:
+        raise CommandError(f"{name}は整数で指定してください: {args[index]}") from None
+
+
+def _slot_arg(args):
+    """セーブスロット番号の引数を取得（1〜MAX_SLOTS）"""
+    slot = _int_arg(args, 0, "スロット")
+    if not 1 <= slot <= MAX_SLOTS:
+        raise CommandError(f"スロットは1〜{MAX_SLOTS}で指定してください")
+    return slot
+
+
+def _add_summary(total, part):
+    """auto_battle の結果に続きの結果を加える"""
+    for key in ("battles", "exp", "turns", "seconds"):
+        total[key] += part[key]
+    for key in ("outcomes", "items_used", "magic_used"):
+        total[key].update(part[key])
+    total["end_level"] = part["end_level"]
+    return total
+
+
+class GameSession:
+    """
+    1つの接続のゲームの状態（main.game_loop の状態をコマンドごとに進める）
+
+    状態は "title"（プレイヤー無し）/ "menu" / "battle" / "closed" のいずれか。
+    """
+
+    __slots__ = ("server", "player_id", "rng", "player", "engine", "current_slot", "state")
+
+    def __init__(self, server, player_id, rng):
+        self.server = server
+        self.player_id = player_id
+        self.rng = rng
+        self.player = None
+        self.engine = None
+        self.current_slot = None  # オートセーブ先（最後にロード・セーブしたスロット）
+        self.state = "title"
+
+    def status(self):
+        """プレイヤー（と戦闘中の敵）の状態"""
+        result = {}
+        if self.player is not None:
+            player = self.player
+            result["player"] = {
+                "name": player.name, "level": player.level, "hp": player.hp, "max_hp": player.max_hp,
+                "mp": player.mp, "max_mp": player.max_mp, "attack": player.attack, "defense": player.defense,
+                "exp": player.exp, "exp_to_next": player.exp_to_next, "items": dict(player.items),
+                "total_battles": player.total_battles, "total_victories": player.total_victories,
+            }
+        if self.engine is not None:
+            enemy = self.engine.enemy
+            result["enemy"] = {"name": enemy.name, "level": enemy.level, "hp": enemy.hp, "max_hp": enemy.max_hp}
+            result["turn"] = self.engine.turn
+        return result
+
+    async def handle(self, command, args):
+        """
+        コマンドを1つ処理する
+
+        Returns:
+            dict: 応答（state は処理後の状態）
+        """
+        handler = getattr(self, f"cmd_{command}", None)
+        if handler is None or command not in self.allowed_commands():
+            raise CommandError(f"このコマンドは使えません: {command}（使えるコマンド: {' '.join(self.allowed_commands())}）")
+        response = await handler(args)
+        return {"ok": True, **response, "state": self.state}
+
+    def allowed_commands(self):
+        """現在の状態で使えるコマンド"""
+        if self.state == "title":
+            return ("login", "new", "load", "saves", "help", "quit")
+        if self.state == "menu":
+            return ("battle", "auto", "rest", "status", "save", "load", "saves", "help", "quit")
+        if self.state == "battle":
+            return (*ACTION_COMMANDS, "status", "help", "quit")
+        return ()
+
+    async def cmd_help(self, args):
+        return {"commands": list(self.allowed_commands())}
+
+    async def cmd_quit(self, args):
+        self.state = "closed"
+        return {"message": "さようなら"}
+
+    async def cmd_login(self, args):
+        if not args:
+            raise CommandError("プレイヤーIDを指定してください")
+        self.player_id = args[0]
+        return {"player_id": self.player_id}
+
+    async def cmd_new(self, args):
+        name = " ".join(args) or "勇者"
+        self.player = Character(name, START_HP, START_HP, START_MP, START_MP, START_ATTACK, START_DEFENSE, level=1)
+        self.current_slot = None
+        self.state = "menu"
+        return {"message": f"ようこそ、{name}!", **self.status()}
+
+    async def cmd_load(self, args):
+        slot = _slot_arg(args)
+        save_data = await self.server.run_io(self.server.store.load_game, slot, self.player_id)
+        if save_data is None:
+            raise CommandError(f"スロット {slot} にセーブデータがありません")
+        self.player = Character.from_save_data(save_data)
+        self.current_slot = slot
+        self.state = "menu"
+        return {"message": f"おかえりなさい、{self.player.name}!", **self.status()}
+
+    async def cmd_saves(self, args):
+        saves = await self.server.run_io(self.server.store.list_saves, MAX_SLOTS, self.player_id)
+        return {"saves": saves}
+
+    async def cmd_save(self, args):
+        slot = _slot_arg(args)
+        if not await self._save(slot):
+            raise CommandError("セーブに失敗しました")
+        self.current_slot = slot
+        return {"message": f"スロット {slot} にセーブしました"}
+
+    async def _save(self, slot):
+        """共有のセーブ先に書き込む（スレッドプールで実行）"""
+        return await self.server.run_io(self.server.store.save_game, self.player, slot, False, self.player_id)
+
+    async def cmd_status(self, args):
+        return self.status()
+
+    async def cmd_rest(self, args):
+        self.player.rest()
+        return {"message": "休憩して完全に回復した!", **self.status()}
+
+    async def cmd_battle(self, args):
+        self.engine = BattleEngine(self.player, create_enemy(self.player.level, self.rng), self.rng)
+        self.state = "battle"
+        return {"events": self.engine.start(), **self.status()}
+
+    async def _act(self, action, option=None):
+        """戦闘の行動を1つ解決する"""
+        if (action, option) not in self.engine.legal_actions():
+            raise CommandError(f"その行動はできません: {action} {option or ''}".strip())
+        events = self.engine.step(action, option)
+        response = {"events": events, **self.status()}
+        if self.engine.is_over():
+            response["result"] = await self._end_battle()
+        return response
+
+    async def _end_battle(self):
+        """戦闘終了の処理（敗北ならゲームオーバー、それ以外はオートセーブ）"""
+        result = self.engine.result
+        self.engine = None
+        await self._after_battles(result == "defeat")
+        return result
+
+    async def _after_battles(self, defeated):
+        """戦闘後の処理（敗北ならゲームオーバーでタイトルに戻り、それ以外はオートセーブ）"""
+        if defeated:
+            self.player = None
+            self.current_slot = None
+            self.state = "title"
+            return
+        self.state = "menu"
+        if self.current_slot is not None:
+            await self._save(self.current_slot)
+
+    async def cmd_attack(self, args):
+        return await self._act("attack")
+
+    async def cmd_magic(self, args):
+        if not args:
+            raise CommandError("魔法名を指定してください")
+        return await self._act("magic", args[0])
+
+    async def cmd_item(self, args):
+        if not args:
+            raise CommandError("アイテム名を指定してください")
+        return await self._act("item", args[0])
+
+    async def cmd_escape(self, args):
+        return await self._act("escape")
+
+    async def cmd_auto(self, args):
+        count = _int_arg(args, 0, "戦闘回数")
+        if not 1 <= count <= MAX_AUTO_BATTLES:
+            raise CommandError(f"戦闘回数は1〜{MAX_AUTO_BATTLES}で指定してください")
+        heal_below = _int_arg(args, 1, "回復するHPの割合", default=30)
+        if not 0 <= heal_below <= 100:
+            raise CommandError("回復するHPの割合は0〜100で指定してください")
+
+        # AUTO_CHUNK 回ごとにイベントループに制御を戻し、他のセッションを待たせない
+        policy = GrindPolicy(heal_below / 100)
+        summary = None
+        while True:
+            part = auto_battle(self.player, min(AUTO_CHUNK, count), policy, rng=self.rng)
+            summary = part if summary is None else _add_summary(summary, part)
+            count -= part["battles"]
+            if count <= 0 or part["outcomes"]["defeat"]:
+                break
+            await asyncio.sleep(0)
+
+        summary = {key: dict(value) if isinstance(value, dict) else value for key, value in summary.items()}
+        await self._after_battles(summary["outcomes"].get("defeat", 0) > 0)
+        return {"summary": summary, **self.status()}
+
+
+class GameServer:
+    """
+    接続ごとに GameSession を作って行単位のコマンドを処理するTCPサーバー
+
+    セーブは全セッションで1つのセーブ先（SqliteSaveStore など、player_id 引数を受け付けるもの）を
+    共有し、読み書きはスレッドプールで行う。
+    """
+
+    def __init__(self, store, seed=None, io_workers=4, idle_timeout=None):
+        """
+        Args:
+            store: セーブ先（SqliteSaveStore）
+            seed: セッションの乱数シードを決める乱数シード（省略時は毎回異なる）
+            io_workers: セーブの読み書きに使うスレッド数
+            idle_timeout: この秒数コマンドが無い接続を切断する（省略時は切断しない）
+        """
+        self.store = store
+        self.seed_rng = random.Random(seed)
+        self.idle_timeout = idle_timeout
+        self.executor = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="save-io")
+        self.sessions = set()
+        self.commands = 0
+        self._ids = itertools.count(1)
+        self._server = None
+
+    async def run_io(self, func, *args):
+        """ブロッキングするセーブの読み書きをスレッドプールで実行"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    def create_session(self):
+        """新しいセッション（ゲストのプレイヤーIDと専用の乱数生成器）を作成"""
+        return GameSession(self, f"guest-{next(self._ids)}", random.Random(self.seed_rng.getrandbits(63)))
+
+    async def handle_connection(self, reader, writer):
+        """1つの接続を処理する"""
+        session = self.create_session()
+        self.sessions.add(session)
+        try:
+            await self._send(writer, {"ok": True, "state": session.state, "player_id": session.player_id,
+                                      "commands": list(session.allowed_commands())})
+            while session.state != "closed":
+                try:
+                    line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    await self._send(writer, {"ok": False, "error": "タイムアウトしました"})
+                    break
+                except (ValueError, asyncio.LimitOverrunError):
+                    await self._send(writer, {"ok": False, "error": f"1行は{MAX_LINE}バイト以内で送ってください"})
+                    break
+                if not line:
+                    break  # 切断された
+
+                try:
+                    command, args = parse_command(line.decode("utf-8", errors="replace"))
+                    if not command:
+                        continue
+                    response = await session.handle(command, args)
+                except CommandError as e:
+                    response = {"ok": False, "error": str(e), "state": session.state}
+                except Exception as e:
+                    # 想定外のエラーでもセッションは続ける（内容はサーバー側に出力）
+                    print(f"コマンドの処理中にエラーが発生しました: player_id={session.player_id} {line!r}", file=sys.stderr)
+                    traceback.print_exc()
+                    response = {"ok": False, "error": f"内部エラーが発生しました: {type(e).__name__}",
+                                "state": session.state}
+                self.commands += 1
+                await self._send(writer, response)
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions.discard(session)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    @staticmethod
+    async def _send(writer, response):
+        """応答を1行のJSONで送る"""
+        writer.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+        await writer.drain()
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        接続の受け付けを開始する
+
+        Returns:
+            asyncio.Server（port=0 の場合は実際のポートを sockets から取得できる）
+        """
+        self._server = await asyncio.start_server(
+            self.handle_connection, host, port, limit=MAX_LINE, backlog=1024
+        )
+        return self._server
+
+    async def close(self):
+        """接続の受け付けを終了し、セーブ先を閉じる"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self.executor.shutdown(wait=True)
+        self.store.close()
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, db_path=DEFAULT_DB_PATH, seed=None, idle_timeout=None):
+    """サーバーを起動して終了するまで接続を処理する"""
+    from sqlite_store import SqliteSaveStore
+
+    server = GameServer(SqliteSaveStore(db_path), seed=seed, idle_timeout=idle_timeout)
+    tcp_server = await server.start(host, port)
+    address = tcp_server.sockets[0].getsockname()
+    print(f"ゲームサーバーを起動しました: {address[0]}:{address[1]}")
+    try:
+        await tcp_server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main():
+    """コマンドラインから実行"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="複数セッションのゲームサーバー")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="待ち受けるアドレス")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="待ち受けるポート")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="セーブを保存するSQLiteデータベース")
+    parser.add_argument("--seed", type=int, default=None, help="セッションの乱数シードを決める乱数シード")
+    parser.add_argument("--idle-timeout", type=float, default=None, help="コマンドの無い接続を切断するまでの秒数")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.db, args.seed, args.idle_timeout))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""プロセスプールで並列実行するプレイスルー・シミュレーター
+
+使い方（simple_rpg ディレクトリで実行）:
+    python -m simulate -n 10000 --workers 8 --seed 42
+"""
+
+import os
+import random
+from collections import Counter
+
+from character import Character, START_HP, START_MP, START_ATTACK, START_DEFENSE
+from enemy_registry import create_enemy
+from engine import BattleEngine
+
+PLAYER_NAME = "勇者"
+
+
+def grind_action(engine):
+    """
+    シミュレーション用のプレイヤーの行動選択
+    （HPが減ったら回復薬、MPがあればヒール、それ以外は攻撃）
+
+    Args:
+        engine: BattleEngineオブジェクト
+
+    Returns:
+        tuple: (行動, オプション)
+    """
+    player = engine.player
+    if player.hp < player.max_hp * 0.3:
+        if player.items.get("回復薬", 0) > 0:
+            return "item", "回復薬"
+        if ("magic", "ヒール") in engine.legal_actions():
+            return "magic", "ヒール"
+    return "attack", None
+
+
+def playthrough_rng(seed, index):
+    """
+    プレイスルーごとの乱数生成器を作成
+    （シードとプレイスルー番号だけで決まるので、ワーカー数に依存しない）
+    """
+    return random.Random(f"{seed}:{index}")
+
+
+def run_playthrough(rng, max_battles):
+    """
+    1回のプレイスルーを実行（敗北するかmax_battles回戦うまで）
+
+    Args:
+        rng: 乱数生成器
+        max_battles: 最大戦闘回数
+
+    Returns:
+        tuple: (到達レベル, 各レベルに到達した戦闘回数の辞書, 敗北したか)
+    """
+    player = Character(PLAYER_NAME, START_HP, START_HP, START_MP, START_MP, START_ATTACK, START_DEFENSE, level=1)
+    reached_at = {1: 0}
+
+    for battle_count in range(1, max_battles + 1):
+        enemy = create_enemy(player.level, rng)
+        engine = BattleEngine(player, enemy, rng)
+        engine.start()
+        while not engine.is_over():
+            engine.step(*grind_action(engine))
+
+        if engine.result == "defeat":
+            return player.level, reached_at, True
+
+        reached_at.setdefault(player.level, battle_count)
+
+        # 戦闘後は休憩して全回復
+        player.rest()
+
+    return player.level, reached_at, False
+
+
+def empty_report():
+    """集計結果の初期値"""
+    return {
+        "playthroughs": 0,
+        "defeats": 0,
+        "final_levels": Counter(),
+        "battles_to_level": {},  # レベル -> [到達数, 戦闘回数合計, 最小, 最大]
+    }
+
+
+def merge_reports(total, part):
+    """
+    部分集計をまとめる（順序に依存しない）
+
+    Args:
+        total: まとめ先の集計結果
+        part: 追加する部分集計
+
+    Returns:
+        dict: まとめた集計結果
+    """
+    total["playthroughs"] += part["playthroughs"]
+    total["defeats"] += part["defeats"]
+    total["final_levels"].update(part["final_levels"])
+    for level, (count, battles, low, high) in part["battles_to_level"].items():
+        entry = total["battles_to_level"].setdefault(level, [0, 0, low, high])
+        entry[0] += count
+        entry[1] += battles
+        entry[2] = min(entry[2], low)
+        entry[3] = max(entry[3], high)
+    return total
+
+
+def run_shard(seed, start, stop, max_battles):
+    """
+    プレイスルー番号 start〜stop-1 を実行して部分集計を返す（ワーカープロセスで実行）
+    """
+    report = empty_report()
+    for index in range(start, stop):
+        level, reached_at, defeated = run_playthrough(playthrough_rng(seed, index), max_battles)
+        report["playthroughs"] += 1
+        report["defeats"] += defeated
+        report["final_levels"][level] += 1
+        for reached_level, battles in reached_at.items():
+            entry = report["battles_to_level"].setdefault(reached_level, [0, 0, battles, battles])
+            entry[0] += 1
+            entry[1] += battles
+            entry[2] = min(entry[2], battles)
+            entry[3] = max(entry[3], battles)
+    return report
+
+
+def simulate(n, seed=0, workers=None, max_battles=200, chunk_size=None):
+    """
+    n回のプレイスルーをプロセスプールに分割して実行
+
+    Args:
+        n: プレイスルー数
+        seed: 乱数シード
+        workers: ワーカープロセス数（省略時はCPUコア数）
+        max_battles: 1プレイスルーの最大戦闘回数
+        chunk_size: 1シャードあたりのプレイスルー数
+
+    Returns:
+        dict: 集計結果
+    """
+    workers = workers or os.cpu_count() or 1
+    chunk_size = chunk_size or max(1, n // (workers * 4))
+    shards = [(start, min(start + chunk_size, n)) for start in range(0, n, chunk_size)]
+
+    report = empty_report()
+    if workers == 1:
+        for start, stop in shards:
+            merge_reports(report, run_shard(seed, start, stop, max_battles))
+        return report
+
+    # ワーカープロセスの起動を速くするため、プールを使うときだけ読み込む
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_shard, seed, start, stop, max_battles) for start, stop in shards]
+        for future in futures:
+            merge_reports(report, future.result())
+    return report
+
+
+def print_report(report):
+    """集計結果を表で表示"""
+    from rich.console import Console
+    from rich.table import Table
+
+    table = Table(title="📈 到達レベルと戦闘回数", show_header=True)
+    table.add_column("レベル", style="cyan", justify="right")
+    table.add_column("到達数", style="green", justify="right")
+    table.add_column("最終到達", style="magenta", justify="right")
+    table.add_column("平均戦闘回数", style="yellow", justify="right")
+    table.add_column("最小", style="white", justify="right")
+    table.add_column("最大", style="white", justify="right")
+
+    for level in sorted(report["battles_to_level"]):
+        count, battles, low, high = report["battles_to_level"][level]
+        table.add_row(
+            str(level),
+            str(count),
+            str(report["final_levels"].get(level, 0)),
+            f"{battles / count:.1f}",
+            str(low),
+            str(high)
+        )
+
+    console = Console()
+    console.print(table)
+    console.print(f"[dim]プレイスルー: {report['playthroughs']} | 敗北: {report['defeats']}[/dim]")
+
+
+def main():
+    """コマンドラインから実行"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="プレイスルーを並列にシミュレート")
+    parser.add_argument("-n", type=int, default=1000, help="プレイスルー数")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    parser.add_argument("--workers", type=int, default=None, help="ワーカープロセス数")
+    parser.add_argument("--max-battles", type=int, default=200, help="1プレイスルーの最大戦闘回数")
+    args = parser.parse_args()
+
+    print_report(simulate(args.n, args.seed, args.workers, args.max_battles))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""NumPyによるモンテカルロ戦闘シミュレーター（勝率推定用）"""
+
+import argparse
+
+import numpy as np
+
+from character import average_player_stats
+from combat import CRITICAL_RATE, damage_table
+from enemy_registry import get_registry
+from engine import ENEMY_ACTION_WEIGHTS
+
+STRONG_ATTACK_RATE = ENEMY_ACTION_WEIGHTS[1]  # 敵が強攻撃を選ぶ確率
+HP_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def _stat(source, key):
+    """辞書またはCharacterからステータスを取得"""
+    if isinstance(source, dict):
+        return source[key]
+    return getattr(source, key)
+
+
+def simulate_battles(player_stats, enemy_template, n=1_000_000, seed=None, max_turns=500):
+    """
+    プレイヤーが毎ターン通常攻撃する戦闘をn回まとめてシミュレート
+
+    全ての戦闘をNumPy配列で同時に進め、1ターンごとにベクトル演算で
+    ダメージを適用する。敵は battle_turn と同じ 70/30 で通常攻撃/強攻撃を選ぶ。
+
+    Args:
+        player_stats: プレイヤーのステータス（hp, attack, defense を持つ辞書かCharacter）
+        enemy_template: 敵のステータス（hp, attack, defense を持つ辞書かCharacter）
+        n: シミュレートする戦闘数
+        seed: 乱数シード
+        max_turns: 打ち切りターン数
+
+    Returns:
+        dict: 勝率、ターン数分布、残りHPのパーセンタイル
+    """
+    rng = np.random.default_rng(seed)
+
+    player_hp = _stat(player_stats, "hp")
+    player_attack = _stat(player_stats, "attack")
+    player_defense = _stat(player_stats, "defense")
+    enemy_hp = _stat(enemy_template, "hp")
+    enemy_attack = _stat(enemy_template, "attack")
+    enemy_defense = _stat(enemy_template, "defense")
+
+    player_damage = damage_table(player_attack, enemy_defense)
+    enemy_damage = damage_table(enemy_attack, player_defense)
+    enemy_strong_damage = damage_table(enemy_attack, player_defense, 1.5)
+
+    php = np.full(n, player_hp, dtype=np.int64)
+    ehp = np.full(n, enemy_hp, dtype=np.int64)
+    turns = np.zeros(n, dtype=np.int64)
+    outcome = np.zeros(n, dtype=np.int8)  # 0: 継続中/打ち切り, 1: 勝利, -1: 敗北
+
+    active = np.arange(n)
+    for turn in range(1, max_turns + 1):
+        if active.size == 0:
+            break
+
+        # プレイヤーの攻撃
+        crit = rng.random(active.size) < CRITICAL_RATE
+        ehp[active] -= np.where(crit, player_damage[1], player_damage[0])
+
+        won = ehp[active] <= 0
+        turns[active[won]] = turn
+        outcome[active[won]] = 1
+        active = active[~won]
+        if active.size == 0:
+            break
+
+        # 敵の攻撃（通常攻撃 or 強攻撃）
+        strong = rng.random(active.size) < STRONG_ATTACK_RATE
+        crit = rng.random(active.size) < CRITICAL_RATE
+        normal_hit = np.where(crit, enemy_damage[1], enemy_damage[0])
+        strong_hit = np.where(crit, enemy_strong_damage[1], enemy_strong_damage[0])
+        php[active] -= np.where(strong, strong_hit, normal_hit)
+
+        lost = php[active] <= 0
+        turns[active[lost]] = turn
+        outcome[active[lost]] = -1
+        active = active[~lost]
+
+    turns[active] = max_turns
+
+    wins = outcome == 1
+    win_count = int(wins.sum())
+    remaining = np.clip(php[wins], 0, None) / player_hp * 100
+    turn_counts = np.bincount(turns, minlength=1)
+
+    return {
+        "n": n,
+        "win_rate": win_count / n,
+        "loss_rate": float((outcome == -1).sum()) / n,
+        "timeout_rate": float(active.size) / n,
+        "mean_turns": float(turns.mean()),
+        "turn_distribution": {t: int(c) for t, c in enumerate(turn_counts) if c},
+        "hp_remaining_percentiles": {
+            p: float(v) for p, v in zip(
+                HP_PERCENTILES,
+                np.percentile(remaining, HP_PERCENTILES) if win_count else [0.0] * len(HP_PERCENTILES)
+            )
+        },
+    }
+
+
+def sweep(levels, n=100_000, seed=None, player_stats=average_player_stats):
+    """
+    create_enemy の全ての敵の種類とレベルの組み合わせをシミュレート
+
+    Args:
+        levels: プレイヤーレベルのイテラブル
+        n: 1組み合わせあたりの戦闘数
+        seed: 乱数シード
+        player_stats: レベルを受け取りプレイヤーのステータスを返す関数
+
+    Returns:
+        list: (レベル, 敵の名前, 結果の辞書) のリスト
+    """
+    registry = get_registry()
+    seeds = np.random.SeedSequence(seed)
+    results = []
+    for level in levels:
+        for type_index, child_seed in enumerate(seeds.spawn(len(registry.types))):
+            enemy = registry.stats_dict(type_index, level)
+            stats = simulate_battles(player_stats(level), enemy, n=n, seed=child_seed)
+            results.append((level, enemy["name"], stats))
+    return results
+
+
+def main():
+    """シミュレーション結果を表で表示"""
+    from rich.console import Console
+    from rich.table import Table
+
+    parser = argparse.ArgumentParser(description="敵の種類×レベルごとの勝率をシミュレート")
+    parser.add_argument("--max-level", type=int, default=10, help="最大プレイヤーレベル")
+    parser.add_argument("-n", type=int, default=100_000, help="1組み合わせあたりの戦闘数")
+    parser.add_argument("--seed", type=int, default=None, help="乱数シード")
+    args = parser.parse_args()
+
+    table = Table(title="🎲 戦闘シミュレーション結果", show_header=True)
+    table.add_column("Lv", style="cyan", justify="right")
+    table.add_column("敵", style="red", no_wrap=True)
+    table.add_column("勝率", style="green", justify="right", no_wrap=True)
+    table.add_column("平均ターン", style="yellow", justify="right")
+    for p in HP_PERCENTILES:
+        table.add_column(f"HP p{p}", style="white", justify="right")
+
+    for level, name, stats in sweep(range(1, args.max_level + 1), n=args.n, seed=args.seed):
+        table.add_row(
+            str(level),
+            name,
+            f"{stats['win_rate'] * 100:.2f}%",
+            f"{stats['mean_turns']:.2f}",
+            *(f"{v:.0f}%" for v in stats["hp_remaining_percentiles"].values())
+        )
+
+    Console().print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""SQLiteを使ったセーブデータの保存先（多数のプレイヤーのセーブを1つのデータベースで管理）"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from save_system import build_save_data
+from serializers import SERIALIZERS, get_serializer, make_header, migrate
+
+DEFAULT_DB_PATH = "saves/saves.db"
+DEFAULT_PLAYER_ID = "default"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS saves (
+    player_id TEXT NOT NULL,
+    slot INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    total_battles INTEGER NOT NULL,
+    total_victories INTEGER NOT NULL,
+    save_date TEXT NOT NULL,
+    format TEXT NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (player_id, slot)
+);
+CREATE INDEX IF NOT EXISTS saves_by_date ON saves (save_date, player_id, slot);
+"""
+
+UPSERT_SQL = """
+INSERT INTO saves (player_id, slot, name, level, total_battles, total_victories, save_date, format, data)
+VALUES (:player_id, :slot, :name, :level, :total_battles, :total_victories, :save_date, :format, :data)
+ON CONFLICT (player_id, slot) DO UPDATE SET
+    name = excluded.name,
+    level = excluded.level,
+    total_battles = excluded.total_battles,
+    total_victories = excluded.total_victories,
+    save_date = excluded.save_date,
+    format = excluded.format,
+    data = excluded.data
+"""
+
+# セーブ選択画面用の列（本体のdata列は読まない）
+HEADER_COLUMNS = "player_id, slot, name, level, total_battles, total_victories, save_date"
+
+
+class ConnectionPool:
+    """
+    スレッド間で共有するSQLite接続のプール
+
+    接続は必要になった時点で作り、使い終わったらプールに戻して再利用する。
+    同時に使える接続は size 個まで（足りない場合は空くまで待つ）。
+    """
+
+    def __init__(self, db_path, size=4, timeout=5.0):
+        """
+        Args:
+            db_path: データベースファイルのパス
+            size: プールする接続の最大数
+            timeout: 他の接続の書き込みを待つ秒数
+        """
+        self.db_path = str(db_path)
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._all = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self):
+        """新しい接続を作成（WALモードで開く）"""
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock:
+            self._all.append(conn)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """
+        プールから接続を1つ借りる（with文で使う）
+
+        ブロックを正常に抜けるとコミット、例外ならロールバックする。
+        """
+        if self._closed:
+            raise RuntimeError("接続プールは閉じられています")
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                with conn:
+                    yield conn
+            finally:
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """全ての接続を閉じる"""
+        self._closed = True
+        with self._lock:
+            for conn in self._all:
+                conn.close()
+            self._all.clear()
+        while not self._idle.empty():
+            self._idle.get_nowait()
+
+
+def _header_from_row(row):
+    """SELECT HEADER_COLUMNS の行をセーブ情報の辞書に変換"""
+    player_id, slot, name, level, total_battles, total_victories, save_date = row
+    return {
+        "player_id": player_id,
+        "slot": slot,
+        "name": name,
+        "level": level,
+        "total_battles": total_battles,
+        "total_victories": total_victories,
+        "save_date": save_date,
+    }
+
+
+class SqliteSaveStore:
+    """
+    SQLiteにセーブデータを保存するクラス（SaveSystem と同じメソッドを持つ）
+
+    セーブは (player_id, slot) を主キーとする1行に保存し、
+    セーブ選択画面用の項目は列として持つため、一覧表示で本体を読む必要はない。
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, player_id=DEFAULT_PLAYER_ID, serializer="json", pool_size=4):
+        """
+        Args:
+            db_path: データベースファイルのパス
+            player_id: player_id を省略したときに使うプレイヤーID
+            serializer: data列の形式（"json" / "binary" またはシリアライザー）
+            pool_size: プールする接続の最大数
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.player_id = player_id
+        self.serializer = get_serializer(serializer)
+        self.pool = ConnectionPool(self.db_path, size=pool_size)
+        with self.pool.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _row_params(self, player_id, slot, save_data):
+        """セーブデータからUPSERT用のパラメーターを作成"""
+        header = make_header(save_data)
+        return {
+            "player_id": player_id,
+            "slot": slot,
+            **header,
+            "format": self.serializer.name,
+            "data": self.serializer.dumps(save_data),
+        }
+
+    def save_game(self, player, slot=1, background=False, player_id=None):
+        """
+        ゲームをセーブする
+
+        Args:
+            player: Characterオブジェクト
+            slot: セーブスロット番号（デフォルト: 1）
+            background: SaveSystem との互換用（SQLiteへの書き込みは常にその場で完了する）
+            player_id: プレイヤーID（省略時は self.player_id）
+
+        Returns:
+            bool: 保存成功時True
+        """
+        try:
+            save_data = build_save_data(player)
+            with self.pool.connection() as conn:
+                conn.execute(UPSERT_SQL, self._row_params(player_id or self.player_id, slot, save_data))
+            return True
+
+        except Exception as e:
+            print(f"セーブエラー: {e}")
+            return False
+
+    def save_many(self, saves):
+        """
+        複数のセーブをまとめて書き込む（1つのトランザクションで実行）
+
+        Args:
+            saves: (player_id, slot, Characterオブジェクト) のイテラブル
+
+        Returns:
+            int: 書き込んだ件数
+        """
+        params = [
+            self._row_params(player_id, slot, build_save_data(player))
+            for player_id, slot, player in saves
+        ]
+        with self.pool.connection() as conn:
+            conn.executemany(UPSERT_SQL, params)
+        return len(params)
+
+    def load_game(self, slot=1, player_id=None):
+        """
+        セーブデータを読み込む
+
+        Args:
+            slot: セーブスロット番号
+            player_id: プレイヤーID（省略時は self.player_id）
+
+        Returns:
+            dict: プレイヤーデータ（失敗時はNone）
+        """
+        try:
+            with self.pool.connection() as conn:
+                row = conn.execute(
+                    "SELECT format, data FROM saves WHERE player_id = ? AND slot = ?",
+                    (player_id or self.player_id, slot)
+                ).fetchone()
+
+            if row is None:
+                return None
+
+            serializer_name, data = row
+            return migrate(SERIALIZERS[serializer_name].loads(data))["player"]
+
+        except Exception as e:
+            print(f"ロードエラー: {e}")
+            return None
+
+    def get_save_info(self, slot=1, player_id=None):
+        """
+        セーブデータの情報を取得（セーブ選択画面用）
+
+        Args:
+            slot: セーブスロット番号
+            player_id: プレイヤーID（省略時は self.player_id）
+
+        Returns:
+            dict: セーブ情報（存在しない場合はNone）
+        """
+        try:
+            with self.pool.connection() as conn:
+                row = conn.execute(
+                    f"SELECT {HEADER_COLUMNS} FROM saves WHERE player_id = ? AND slot = ?",
+                    (player_id or self.player_id, slot)
+                ).fetchone()
+            return None if row is None else _header_from_row(row)
+
+        except Exception as e:
+            print(f"セーブ情報取得エラー: {e}")
+            return None
+
+    def list_saves(self, max_slots=3, player_id=None):
+        """
+        全てのセーブスロットの情報を取得
+
+        Args:
+            max_slots: 最大スロット数
+            player_id: プレイヤーID（省略時は self.player_id）
+
+        Returns:
+            list: セーブ情報のリスト（空きスロットはNone）
+        """
+        saves = [None] * max_slots
+        try:
+            with self.pool.connection() as conn:
+                rows = conn.execute(
+                    f"SELECT {HEADER_COLUMNS} FROM saves WHERE player_id = ? AND slot BETWEEN 1 AND ?",
+                    (player_id or self.player_id, max_slots)
+                ).fetchall()
+        except Exception as e:
+            print(f"セーブ情報取得エラー: {e}")
+            return saves
+
+        for row in rows:
+            info = _header_from_row(row)
+            saves[info["slot"] - 1] = info
+        return saves
+
+    def page_saves(self, limit=50, after=None, player_id=None):
+        """
+        セーブ情報を新しい順にページ単位で取得（キーセット方式）
+
+        Args:
+            limit: 1ページの件数
+            after: 前のページの最後のセーブ情報（省略時は先頭のページ）
+            player_id: 指定したプレイヤーのセーブだけに絞り込む
+
+        Returns:
+            list: セーブ情報のリスト
+        """
+        conditions = []
+        params = []
+        if player_id is not None:
+            conditions.append("player_id = ?")
+            params.append(player_id)
+        if after is not None:
+            conditions.append("(save_date, player_id, slot) < (?, ?, ?)")
+            params += [after["save_date"], after["player_id"], after["slot"]]
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                f"SELECT {HEADER_COLUMNS} FROM saves {where} "
+                "ORDER BY save_date DESC, player_id DESC, slot DESC LIMIT ?",
+                (*params, limit)
+            ).fetchall()
+        return [_header_from_row(row) for row in rows]
+
+    def count_saves(self, player_id=None):
+        """セーブの件数を取得（player_id 指定時はそのプレイヤーの件数）"""
+        with self.pool.connection() as conn:
+            if player_id is None:
+                return conn.execute("SELECT COUNT(*) FROM saves").fetchone()[0]
+            return conn.execute("SELECT COUNT(*) FROM saves WHERE player_id = ?", (player_id,)).fetchone()[0]
+
+    def delete_save(self, slot=1, player_id=None):
+        """
+        セーブデータを削除
+
+        Args:
+            slot: セーブスロット番号
+            player_id: プレイヤーID（省略時は self.player_id）
+
+        Returns:
+            bool: 削除成功時True
+        """
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.execute(
+                    "DELETE FROM saves WHERE player_id = ? AND slot = ?",
+                    (player_id or self.player_id, slot)
+                )
+            return cursor.rowcount > 0
+
+        except Exception as e:
+            print(f"削除エラー: {e}")
+            return False
+
+    def flush(self):
+        """SaveSystem との互換用（書き込みは常に完了している）"""
+
+    def close(self):
+        """データベースへの接続を閉じる"""
+        self.pool.close()
@@ -0,0 +1,120 @@
+"""起動時間（モジュールのimport時間）のベンチマーク
+
+モジュールごとに新しいPythonプロセスを起動して import し、
+プロセス全体の時間と python -X importtime によるimport時間を計測する。
+ヘッドレスのワーカー（simulate など）の起動が遅くなっていないかの確認用。
+
+使い方（simple_rpg ディレクトリで実行）:
+    python -m startup_bench                     # 既定のモジュールを計測
+    python -m startup_bench engine main -r 20   # モジュールと回数を指定
+    python -m startup_bench --top 10            # import時間の大きいモジュールも表示
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+DEFAULT_MODULES = ["engine", "autobattle", "simulate", "replay", "markov", "main"]
+
+# ヘッドレスで読み込まれていないことを確認する重いモジュール
+HEAVY_MODULES = ["rich", "rich.table", "rich.layout", "asyncio"]
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _run(code):
+    """新しいプロセスでコードを実行し、(経過秒, 標準出力, 標準エラー) を返す"""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=HERE, capture_output=True, text=True, check=True
+    )
+    return time.perf_counter() - start, proc.stdout, proc.stderr
+
+
+def parse_importtime(stderr):
+    """
+    python -X importtime の出力を解析
+
+    Returns:
+        list: (モジュール名, 自身の時間μs, 累積時間μs) のリスト
+    """
+    result = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        result.append((name.strip(), int(self_us), int(cumulative_us)))
+    return result
+
+
+def measure(module, repeat=10):
+    """
+    モジュールの起動時間を計測
+
+    Args:
+        module: モジュール名
+        repeat: プロセスを起動する回数
+
+    Returns:
+        dict: module, process_ms（中央値）, import_ms（中央値）, loaded（読み込まれた重いモジュール）,
+              imports（(モジュール名, 自身の時間ms) の最後の計測結果）
+    """
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    process_times, import_times = [], []
+    for _ in range(repeat):
+        seconds, stdout, stderr = _run(code)
+        imports = parse_importtime(stderr)
+        process_times.append(seconds)
+        import_times.append(next(cumulative for name, _, cumulative in imports if name == module) / 1e6)
+
+    return {
+        "module": module,
+        "process_ms": statistics.median(process_times) * 1000,
+        "import_ms": statistics.median(import_times) * 1000,
+        "loaded": [name for name in stdout.strip().split(",") if name],
+        "imports": [(name, self_us / 1000) for name, self_us, _ in imports],
+    }
+
+
+def measure_baseline(repeat=10):
+    """何もimportしないPythonプロセスの起動時間（ms、中央値）"""
+    return statistics.median(_run("pass")[0] for _ in range(repeat)) * 1000
+
+
+def print_report(results, baseline_ms, top=0):
+    """計測結果を表示"""
+    print(f"Python の起動のみ: {baseline_ms:.1f}ms")
+    print(f"{'モジュール':<12} {'プロセスms':>10} {'importms':>9}  読み込まれた重いモジュール")
+    for result in results:
+        print(f"{result['module']:<12} {result['process_ms']:>10.1f} {result['import_ms']:>9.1f}  "
+              f"{', '.join(result['loaded']) or '-'}")
+        if top:
+            for name, ms in sorted(result["imports"], key=lambda item: -item[1])[:top]:
+                print(f"{'':<12} {ms:>10.2f}ms  {name}")
+
+
+def main():
+    """コマンドラインから実行"""
+    parser = argparse.ArgumentParser(description="モジュールの起動時間を計測")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES, help="計測するモジュール")
+    parser.add_argument("-r", "--repeat", type=int, default=10, help="プロセスを起動する回数")
+    parser.add_argument("--top", type=int, default=0, help="import時間の大きいモジュールを表示する数")
+    parser.add_argument("--json", default=None, help="結果をJSONで書き出すファイル")
+    args = parser.parse_args()
+
+    baseline_ms = measure_baseline(args.repeat)
+    results = [measure(module, args.repeat) for module in args.modules]
+    print_report(results, baseline_ms, args.top)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"baseline_ms": baseline_ms, "results": results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,23 @@
-"""UI表示関連の関数"""
+"""UI表示関連の関数（rich の layout / live / table は初めて使うときに読み込む）"""
+
+from functools import lru_cache
 
-from rich.console import Console
 from rich.panel import Panel
-from rich.layout import Layout
-from rich.table import Table
-from rich.prompt import Prompt
 
-console = Console()
+import metrics
+from autobattle import MAX_AUTO_BATTLES
+from combat import MAGIC_LIST, ITEM_LIST
+from animation import scheduler
+from game_io import console, ask, ask_int
+
+PANEL_CACHE_SIZE = 256  # キャラクターパネルのキャッシュ数
+BAR_WIDTH = 20  # HP/MP/EXPバーのマス数
 
 
 def create_battle_layout():
     """戦闘画面全体のレイアウトを作成"""
+    from rich.layout import Layout
+
     layout = Layout()
     layout.split_column(
         Layout(name="header", size=3),
@@ -30,52 +37,167 @@ def create_battle_layout():
     return layout
 
 
+def character_panel_key(character, is_player=True):
+    """キャラクターパネルに表示される値のタプル（変化の判定用）"""
+    return (
+        character.name, character.hp, character.max_hp, character.mp, character.max_mp,
+        character.exp, character.exp_to_next, character.level, character.attack, character.defense,
+        is_player
+    )
+
+
+class BattleScreen:
+    """
+    戦闘画面を1つのLive表示で管理するクラス
+
+    画面をクリアして全体を描き直す代わりに、表示内容が変わった
+    パネル（プレイヤー・敵・ログ・フッター）だけを更新して再描画する。
+    メニューや演出はLive表示の上に出力される。
+    """
+
+    height = 28  # ヘッダー3 + ステータス12 + ログ12 + フッター1
+
+    def __init__(self):
+        from rich.layout import Layout
+
+        self.layout = create_battle_layout()
+        self.layout["main"]["status"].split_row(
+            Layout(name="player"),
+            Layout(name="enemy")
+        )
+        self.live = None
+        self._keys = {}
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self):
+        """Live表示を開始"""
+        if self.live is None:
+            from rich.live import Live
+            self.live = Live(self, console=console, auto_refresh=False)
+            self.live.start()
+
+    def stop(self):
+        """Live表示を終了（最後の画面はそのまま残る）"""
+        if self.live is not None:
+            self.live.stop()
+            self.live = None
+
+    def __rich_console__(self, console, options):
+        # レイアウトは端末の高さいっぱいに広がるので、戦闘画面の高さに固定する
+        yield from console.render(self.layout, options.update(height=self.height))
+
+    def _update_region(self, name, key, render):
+        """表示内容が変わった場合だけ領域を更新"""
+        if self._keys.get(name) == key:
+            return False
+        self._keys[name] = key
+        self.layout[name].update(render())
+        return True
+
+    def update(self, player, enemy, battle_log, footer=""):
+        """
+        変化したパネルだけを更新して再描画
+
+        Args:
+            player: プレイヤーのCharacterオブジェクト
+            enemy: 敵のCharacterオブジェクト
+            battle_log: BattleLogオブジェクト
+            footer: フッターに表示する文字列
+        """
+        changed = self._update_region(
+            "player", character_panel_key(player, True), lambda: create_character_panel(player, True)
+        )
+        changed |= self._update_region(
+            "enemy", character_panel_key(enemy, False), lambda: create_character_panel(enemy, False)
+        )
+        changed |= self._update_region("log", (id(battle_log), battle_log.version), battle_log.render)
+        changed |= self._update_region("footer", footer, lambda: footer)
+
+        if changed and self.live is not None:
+            self.live.refresh()
+
+
 def create_character_panel(character, is_player=True):
-    """キャラクターステータスパネルを作成"""
-    hp_percentage = (character.hp / character.max_hp) * 100
+    """キャラクターステータスパネルを作成（表示する値が同じならキャッシュを返す）"""
+    if metrics.enabled:
+        metrics.count("create_character_panel")
+    return _build_character_panel(*character_panel_key(character, is_player))
+
+
+@lru_cache(maxsize=PANEL_CACHE_SIZE)
+def _build_character_panel(name, hp, max_hp, mp, max_mp, exp, exp_to_next, level, attack, defense, is_player):
+    """表示する値からキャラクターステータスパネルを組み立てる"""
+    from rich.table import Table
+
+    hp_percentage = (hp / max_hp) * 100
     hp_color = "green" if hp_percentage > 50 else "yellow" if hp_percentage > 25 else "red"
 
     # HPバー
-    hp_bars = int(hp_percentage / 5)
-    hp_bar = "█" * hp_bars + "░" * (20 - hp_bars)
+    hp_bar = _bar(int(hp_percentage / 5))
 
     table = Table(show_header=False, box=None, padding=(0, 1))
     table.add_column(style="bold cyan", width=8)
     table.add_column()
 
-    table.add_row("名前", f"[bold]{character.name}[/bold]")
-    table.add_row("HP", f"[{hp_color}]{hp_bar}[/{hp_color}] {character.hp}/{character.max_hp}")
+    table.add_row("名前", f"[bold]{name}[/bold]")
+    table.add_row("HP", f"[{hp_color}]{hp_bar}[/{hp_color}] {hp}/{max_hp}")
 
     if is_player:
-        mp_bars = int((character.mp / character.max_mp) * 20)
-        mp_bar = "█" * mp_bars + "░" * (20 - mp_bars)
-        table.add_row("MP", f"[blue]{mp_bar}[/blue] {character.mp}/{character.max_mp}")
+        mp_bar = _bar(int((mp / max_mp) * 20))
+        table.add_row("MP", f"[blue]{mp_bar}[/blue] {mp}/{max_mp}")
         
-        # ↓↓↓ ここから追加 ↓↓↓
-        table.add_row("レベル", f"[magenta]{character.level}[/magenta]")
+        table.add_row("レベル", f"[magenta]{level}[/magenta]")
         
         # 経験値バー
-        exp_percentage = (character.exp / character.exp_to_next) * 100
-        exp_bars = int(exp_percentage / 5)
-        exp_bar = "█" * exp_bars + "░" * (20 - exp_bars)
-        table.add_row("EXP", f"[yellow]{exp_bar}[/yellow] {character.exp}/{character.exp_to_next}")
-        # ↑↑↑ ここまで追加 ↑↑↑
+        exp_percentage = (exp / exp_to_next) * 100
+        exp_bar = _bar(int(exp_percentage / 5))
+        table.add_row("EXP", f"[yellow]{exp_bar}[/yellow] {exp}/{exp_to_next}")
         
-        table.add_row("攻撃力", f"[yellow]{character.attack}[/yellow]")
-        table.add_row("防御力", f"[cyan]{character.defense}[/cyan]")
+        table.add_row("攻撃力", f"[yellow]{attack}[/yellow]")
+        table.add_row("防御力", f"[cyan]{defense}[/cyan]")
 
     border_color = "green" if is_player else "red"
     emoji = "🛡️" if is_player else "👹"
 
     return Panel(
         table,
-        title=f"{emoji} {character.name}",
+        title=f"{emoji} {name}",
         border_style=border_color
     )
 
 
+@lru_cache(maxsize=BAR_WIDTH + 1)
+def _bar(filled):
+    """20マスのバー文字列を作成"""
+    filled = max(0, min(BAR_WIDTH, filled))
+    return "█" * filled + "░" * (BAR_WIDTH - filled)
+
+
+def panel_cache_info():
+    """
+    キャラクターパネルのキャッシュの状態を取得
+
+    Returns:
+        functools._CacheInfo: hits, misses, maxsize, currsize
+    """
+    return _build_character_panel.cache_info()
+
+
+def clear_panel_cache():
+    """キャラクターパネルのキャッシュを破棄"""
+    _build_character_panel.cache_clear()
+
+
 def show_action_menu(player):
     """アクションメニューを表示して選択を取得"""
+    from rich.table import Table
+
     table = Table(show_header=False, box=None, padding=(0, 2))
     table.add_column(style="bold yellow", width=3)
     table.add_column(style="white")
@@ -87,7 +209,7 @@ def show_action_menu(player):
 
     console.print(table)
 
-    choice = Prompt.ask(
+    choice = ask(
         "[bold cyan]行動を選択してください[/bold cyan]",
         choices=["1", "2", "3", "4"],
         default="1"
@@ -98,20 +220,16 @@ def show_action_menu(player):
 
 def show_magic_menu(player):
     """魔法選択メニューを表示"""
+    from rich.table import Table
+
     table = Table(title="✨ 魔法リスト", show_header=True)
     table.add_column("No.", style="cyan", width=4)
     table.add_column("魔法", style="magenta", width=12)
     table.add_column("MP", style="blue", width=6)
     table.add_column("効果", style="white")
 
-    magic_list = [
-        ("1", "ファイア", 10, "敵に炎属性ダメージ", 1.5),
-        ("2", "ヒール", 15, "HPを30回復", 0),
-        ("3", "サンダー", 20, "敵に雷属性ダメージ", 2.0),
-    ]
-
     available_choices = ["0"]
-    for num, name, mp, effect, _ in magic_list:
+    for num, name, mp, effect, _ in MAGIC_LIST:
         if player.mp < mp:
             table.add_row(num, f"[dim]{name}[/dim]", f"[dim]{mp}[/dim]", f"[dim]{effect}[/dim]")
         else:
@@ -120,7 +238,7 @@ def show_magic_menu(player):
 
     console.print(table)
 
-    choice = Prompt.ask(
+    choice = ask(
         "使用する魔法を選択 (0: 戻る)",
         choices=available_choices
     )
@@ -128,24 +246,21 @@ def show_magic_menu(player):
     if choice == "0":
         return None
 
-    return magic_list[int(choice) - 1]
+    return MAGIC_LIST[int(choice) - 1]
 
 
 def show_item_menu(player):
     """アイテムメニューを表示"""
+    from rich.table import Table
+
     table = Table(title="🎒 アイテム", show_header=True)
     table.add_column("No.", style="cyan", width=4)
     table.add_column("アイテム", style="green", width=12)
     table.add_column("所持数", style="yellow", width=8)
     table.add_column("効果", style="white")
 
-    item_list = [
-        ("1", "回復薬", "HP 50回復"),
-        ("2", "魔法の水", "MP 20回復"),
-    ]
-
     available_choices = ["0"]
-    for idx, (num, name, effect) in enumerate(item_list, 1):
+    for idx, (num, name, effect) in enumerate(ITEM_LIST, 1):
         count = player.items.get(name, 0)
         if count > 0:
             table.add_row(num, name, f"x{count}", effect)
@@ -157,11 +272,10 @@ def show_item_menu(player):
 
     if len(available_choices) == 1:
         console.print("[red]使用できるアイテムがありません[/red]")
-        import time
-        time.sleep(1)
+        scheduler.wait(1)
         return None
 
-    choice = Prompt.ask(
+    choice = ask(
         "使用するアイテムを選択 (0: 戻る)",
         choices=available_choices
     )
@@ -169,15 +283,10 @@ def show_item_menu(player):
     if choice == "0":
         return None
 
-    return item_list[int(choice) - 1][1]
+    return ITEM_LIST[int(choice) - 1][1]
 
 def show_level_up(level_up_data):
     """レベルアップの演出を表示"""
-    from rich.console import Console
-    from rich.panel import Panel
-    import time
-    
-    console = Console()
     level = level_up_data["level"]
     
     console.print()
@@ -192,7 +301,97 @@ def show_level_up(level_up_data):
         title="🎉 レベルアップ",
         border_style="bold yellow"
     ))
-    time.sleep(3)
+    scheduler.wait(3)
+
+def show_auto_battle_menu():
+    """
+    自動戦闘の設定メニューを表示
+
+    Returns:
+        tuple: (戦闘回数, 回復するHPの割合, アイテムを使うか)（キャンセル時はNone）
+    """
+    console.print(Panel(
+        "[white]描画なしで戦闘を続けて行い、最後に結果をまとめて表示します\n"
+        "戦闘の間は休憩して全回復し、敗北した時点で終了します[/white]",
+        title="🤖 自動戦闘",
+        border_style="cyan"
+    ))
+
+    while True:
+        count = ask_int(f"戦闘回数 (1〜{MAX_AUTO_BATTLES}, 0: キャンセル)", default=10)
+        if count <= 0:
+            return None
+        if count <= MAX_AUTO_BATTLES:
+            break
+        console.print(f"[red]戦闘回数は{MAX_AUTO_BATTLES}回までです[/red]")
+    heal_below = ask_int("HPが何%を下回ったら回復しますか", choices=["0", "10", "20", "30", "50", "70"], default=30)
+    use_items = ask("回復薬・魔法の水を使いますか?", choices=["y", "n"], default="y") == "y"
+    return count, heal_below / 100, use_items
+
+
+def show_auto_battle_summary(summary, player):
+    """
+    自動戦闘の結果を表示
+
+    Args:
+        summary: autobattle.auto_battle の戻り値
+        player: プレイヤーのCharacterオブジェクト
+    """
+    from rich.table import Table
+
+    outcomes = summary["outcomes"]
+    table = Table(title="🤖 自動戦闘の結果", show_header=False)
+    table.add_column("項目", style="cyan")
+    table.add_column("値", style="white", justify="right")
+
+    table.add_row("戦闘回数", str(summary["battles"]))
+    table.add_row("勝利 / 逃走 / 敗北",
+                  f"[green]{outcomes['victory']}[/green] / [yellow]{outcomes['escaped']}[/yellow] / "
+                  f"[red]{outcomes['defeat']}[/red]")
+    table.add_row("獲得経験値", f"[yellow]{summary['exp']}[/yellow]")
+    table.add_row("レベル", f"{summary['start_level']} → [bold cyan]{summary['end_level']}[/bold cyan] "
+                  f"(+{summary['end_level'] - summary['start_level']})")
+    used = {**summary["magic_used"], **summary["items_used"]}
+    table.add_row("使用した魔法・アイテム", ", ".join(f"{name} ×{count}" for name, count in used.items()) or "-")
+    table.add_row("残りアイテム", ", ".join(f"{name} ×{count}" for name, count in player.items.items()))
+    table.add_row("平均ターン数", f"{summary['turns'] / summary['battles']:.1f}" if summary["battles"] else "-")
+    table.add_row("所要時間", f"{summary['seconds'] * 1000:.1f}ms")
+
+    console.print(table)
+
+def show_battle_history(player, max_levels=10):
+    """
+    戦闘履歴の集計（敵の種類ごとの勝率・敵のレベルごとの平均ターン数）を表示
+
+    Args:
+        player: プレイヤーのCharacterオブジェクト
+        max_levels: 表示する敵のレベルの数（高い方から）
+    """
+    from rich.table import Table
+
+    history = player.history
+    if history is None or not len(history):
+        console.print("[dim]戦闘履歴はまだありません[/dim]")
+        return
+
+    table = Table(title=f"📈 敵ごとの戦績 (全{len(history)}戦)", show_header=True)
+    table.add_column("敵", style="cyan")
+    table.add_column("戦闘", justify="right")
+    table.add_column("勝利 / 逃走 / 敗北", justify="right")
+    table.add_column("勝率", style="magenta", justify="right")
+    for name, stats in history.win_rate_by_enemy().items():
+        table.add_row(name, str(stats["battles"]),
+                      f"[green]{stats['victories']}[/green] / [yellow]{stats['escapes']}[/yellow] / "
+                      f"[red]{stats['defeats']}[/red]",
+                      f"{stats['win_rate'] * 100:.1f}%")
+    console.print(table)
+
+    table = Table(title="⏱ 敵のレベル別の平均ターン数", show_header=True)
+    table.add_column("敵のレベル", style="cyan", justify="right")
+    table.add_column("平均ターン数", style="yellow", justify="right")
+    for level, turns in list(history.average_turns_by_level().items())[-max_levels:]:
+        table.add_row(str(level), f"{turns:.1f}")
+    console.print(table)
 
 def show_save_menu(save_system, max_slots=3):
     """
@@ -205,13 +404,9 @@ def show_save_menu(save_system, max_slots=3):
     Returns:
         int: 選択されたスロット番号（キャンセル時は0）
     """
-    from rich.console import Console
     from rich.table import Table
-    from rich.prompt import IntPrompt
     from save_system import format_datetime
     
-    console = Console()
-    
     table = Table(title="💾 セーブスロット選択", show_header=True)
     table.add_column("スロット", style="cyan", width=8)
     table.add_column("名前", style="green", width=12)
@@ -237,7 +432,7 @@ def show_save_menu(save_system, max_slots=3):
     console.print(table)
     console.print("\n[dim]0: キャンセル[/dim]")
     
-    choice = IntPrompt.ask(
+    choice = ask_int(
         "スロットを選択してください",
         choices=[str(i) for i in range(0, max_slots + 1)],
         default=1
@@ -257,13 +452,9 @@ def show_load_menu(save_system, max_slots=3):
     Returns:
         int: 選択されたスロット番号（キャンセル時は0）
     """
-    from rich.console import Console
     from rich.table import Table
-    from rich.prompt import IntPrompt
     from save_system import format_datetime
     
-    console = Console()
-    
     table = Table(title="📂 ロードスロット選択", show_header=True)
     table.add_column("スロット", style="cyan", width=8)
     table.add_column("名前", style="green", width=12)
@@ -295,7 +486,7 @@ def show_load_menu(save_system, max_slots=3):
         console.print("[red]ロード可能なセーブデータがありません[/red]")
         return 0
     
-    choice = IntPrompt.ask(
+    choice = ask_int(
         "ロードするスロットを選択してください",
         choices=available_slots,
         default=1 if "1" in available_slots else 0